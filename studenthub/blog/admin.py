@@ -4,7 +4,7 @@ from .models import Post, PostComment
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('title', 'author', 'created_at', 'comment_count')
+    list_display = ('title', 'author', 'created_at', 'comment_count', 'view_count')
     list_filter = ('created_at',)
     search_fields = ('title', 'content', 'author__username')
     date_hierarchy = 'created_at'
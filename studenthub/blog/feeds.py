@@ -0,0 +1,34 @@
+from django.urls import reverse, reverse_lazy
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.html import escape
+from studenthub.feeds import CachedFeed
+from .models import Post
+
+
+class LatestPostsFeed(CachedFeed):
+    model = Post
+    title = 'StudentHub Blog'
+    link = reverse_lazy('blog:post_list')
+    description = 'The latest posts from the StudentHub student blog.'
+
+    def get_queryset(self):
+        # Items only need the stored excerpt, not the post bodies
+        return super().get_queryset().select_related('author').defer('content', 'content_html')
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        # Feed readers treat descriptions as HTML; the excerpt is plain text
+        return escape(item.excerpt)
+
+    def item_link(self, item):
+        return reverse('blog:post_detail', args=[item.pk])
+
+    def item_author_name(self, item):
+        return item.author.username
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from blog.models import Post
+from blog.rendering import renderer_version
+
+
+class Command(BaseCommand):
+    help = 'Regenerate the stored HTML and excerpt of posts rendered by an older renderer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-render every post, not just stale ones')
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        posts = Post.objects.order_by('pk')
+        if not options['all']:
+            posts = posts.exclude(render_version=renderer_version())
+        
+        batch_size = options['batch_size']
+        total = 0
+        last_pk = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk).only('content')[:batch_size])
+            if not batch:
+                break
+            for post in batch:
+                post.render()
+            Post.objects.bulk_update(batch, Post.RENDERED_FIELDS)
+            total += len(batch)
+            last_pk = batch[-1].pk
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Re-rendered {total} posts.')
+        )
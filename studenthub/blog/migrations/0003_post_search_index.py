@@ -0,0 +1,37 @@
+from django.db import migrations, OperationalError
+
+
+FTS_TABLE = 'blog_post_fts'
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "title, content, tokenize='unicode61 remove_diacritics 2')"
+        )
+    except OperationalError:
+        # SQLite built without FTS5; search uses the in-process index
+        return
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, title, content) "
+        "SELECT id, title, content FROM blog_post"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
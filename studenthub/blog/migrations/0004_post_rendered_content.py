@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:42
+
+import html
+from django.db import migrations, models
+from django.utils.html import linebreaks, strip_tags
+from django.utils.text import Truncator
+
+
+# Frozen copy of the plain-text renderer in blog/rendering.py at the time of
+# this migration; "manage.py rerender_posts" brings rows up to date with the
+# current renderer (e.g. with BLOG_MARKDOWN on)
+RENDER_VERSION = 'plain-1'
+EXCERPT_WORDS = 25
+
+
+def render_posts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    posts = list(Post.objects.only('content'))
+    for post in posts:
+        post.content_html = linebreaks(post.content, autoescape=True)
+        post.excerpt = Truncator(html.unescape(strip_tags(post.content_html))).words(EXCERPT_WORDS)
+        post.render_version = RENDER_VERSION
+    Post.objects.bulk_update(posts, ['content_html', 'excerpt', 'render_version'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='render_version',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.RunPython(render_posts, migrations.RunPython.noop),
+    ]
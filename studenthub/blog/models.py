@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils.safestring import mark_safe
+from .rendering import make_excerpt, render_html, renderer_version
 
 
 class Post(models.Model):
@@ -8,15 +10,61 @@ class Post(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
     created_at = models.DateTimeField(auto_now_add=True)
     
+    # Generated from content on save (see blog/rendering.py)
+    content_html = models.TextField(blank=True, editable=False)
+    excerpt = models.TextField(blank=True, editable=False)
+    render_version = models.CharField(max_length=20, blank=True, editable=False)
+    
+    # Flushed from the view buffer (see studenthub/viewcounts.py)
+    view_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    RENDERED_FIELDS = ('content_html', 'excerpt', 'render_version')
+    COUNTER_FIELDS = ('view_count',)
+    
     def __str__(self):
         return self.title
     
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if not self._state.adding and update_fields is None:
+            # Never write back a possibly stale in-memory view count
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+            kwargs['update_fields'] = update_fields
+        if update_fields is None or 'content' in update_fields:
+            self.render()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *self.RENDERED_FIELDS}
+        super().save(*args, **kwargs)
+    
+    def render(self):
+        """Regenerate the stored HTML and excerpt from content"""
+        self.content_html = render_html(self.content)
+        self.excerpt = make_excerpt(self.content_html)
+        self.render_version = renderer_version()
+    
+    @property
+    def rendered_content(self):
+        """
+        The post body as HTML. Rows stored by an older renderer are rendered
+        on the fly without being written; "manage.py rerender_posts" stores them.
+        """
+        if self.render_version != renderer_version():
+            return mark_safe(render_html(self.content))
+        return mark_safe(self.content_html)
+    
     @property
     def comment_count(self):
         return self.comments.count()
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='post_created_idx'),
+            models.Index(fields=['-view_count', '-created_at'], name='post_views_idx'),
+        ]
 
 
 class PostComment(models.Model):
@@ -30,3 +78,6 @@ class PostComment(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['post', '-created_at'], name='postcomment_post_created_idx'),
+        ]
@@ -0,0 +1,121 @@
+"""
+Turning Post.content into the HTML and excerpt stored on the post.
+
+Posts are plain text with line breaks by default; with BLOG_MARKDOWN = True
+(and the optional "markdown" package installed) they are rendered as
+Markdown, with any raw HTML in the source escaped and the output reduced
+to an allowlist of tags, attributes and link schemes. renderer_version()
+names the renderer in use, so posts saved by an older one can be found and
+regenerated ("manage.py rerender_posts").
+"""
+import html
+import re
+from html.parser import HTMLParser
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.html import linebreaks, strip_tags
+from django.utils.text import Truncator
+
+
+# Bump a renderer's revision whenever its output from render_html() or
+# make_excerpt() changes; only posts saved by that renderer are then stale
+RENDERER_REVISIONS = {'plain': 1, 'markdown': 3}
+
+EXCERPT_WORDS = 25
+
+MARKDOWN_EXTENSIONS = ['fenced_code', 'tables', 'sane_lists']
+
+# What sanitize_html() keeps of the Markdown output
+ALLOWED_TAGS = {
+    'a', 'b', 'blockquote', 'br', 'code', 'em', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr',
+    'i', 'img', 'li', 'ol', 'p', 'pre', 'strong', 'table', 'tbody', 'td', 'th', 'thead',
+    'tr', 'ul',
+}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'img': {'src', 'alt', 'title'},
+    'ol': {'start'},
+    'td': {'align'},
+    'th': {'align'},
+    'code': {'class'},
+}
+URL_ATTRIBUTES = {'href', 'src'}
+URL_SCHEMES = {'http', 'https', 'mailto'}
+VOID_TAGS = {'br', 'hr', 'img'}
+
+SCHEME_RE = re.compile(r'^([a-z][a-z0-9+.-]*):', re.IGNORECASE)
+IGNORED_URL_CHARS_RE = re.compile(r'[\x00-\x20\x7f]')
+
+
+def markdown_enabled():
+    return getattr(settings, 'BLOG_MARKDOWN', False)
+
+
+def renderer_version():
+    renderer = 'markdown' if markdown_enabled() else 'plain'
+    return f'{renderer}-{RENDERER_REVISIONS[renderer]}'
+
+
+def render_html(content):
+    if not markdown_enabled():
+        return linebreaks(content, autoescape=True)
+    try:
+        import markdown
+        from markdown.extensions import Extension
+    except ImportError as exc:
+        raise ImproperlyConfigured('BLOG_MARKDOWN requires the "markdown" package') from exc
+
+    class RawHtmlAsText(Extension):
+        """Leave raw HTML in the source as text, which Markdown then escapes once"""
+
+        def extendMarkdown(self, md):
+            md.preprocessors.deregister('html_block')
+            md.inlinePatterns.deregister('html')
+
+    rendered = markdown.markdown(content, extensions=[*MARKDOWN_EXTENSIONS, RawHtmlAsText()])
+    return sanitize_html(rendered)
+
+
+def safe_url(url):
+    """Whether url is relative or uses one of URL_SCHEMES"""
+    # Browsers ignore whitespace and control characters inside the scheme
+    scheme = SCHEME_RE.match(IGNORED_URL_CHARS_RE.sub('', url))
+    return scheme is None or scheme.group(1).lower() in URL_SCHEMES
+
+
+class Sanitizer(HTMLParser):
+    """Re-serialise HTML keeping only allowlisted tags, attributes and URLs"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in ALLOWED_TAGS:
+            return
+        kept = ''.join(
+            f' {name}="{html.escape(value)}"'
+            for name, value in attrs
+            if name in ALLOWED_ATTRIBUTES.get(tag, ()) and value is not None
+            and (name not in URL_ATTRIBUTES or safe_url(value))
+        )
+        self.parts.append(f'<{tag}{kept}>')
+
+    def handle_endtag(self, tag):
+        if tag in ALLOWED_TAGS and tag not in VOID_TAGS:
+            self.parts.append(f'</{tag}>')
+
+    def handle_data(self, data):
+        self.parts.append(html.escape(data, quote=False))
+
+
+def sanitize_html(rendered):
+    sanitizer = Sanitizer()
+    sanitizer.feed(rendered)
+    sanitizer.close()
+    return ''.join(sanitizer.parts)
+
+
+def make_excerpt(rendered):
+    """Plain-text opening words of the rendered post"""
+    return Truncator(html.unescape(strip_tags(rendered))).words(EXCERPT_WORDS)
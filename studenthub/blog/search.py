@@ -0,0 +1,260 @@
+"""
+Ranked full-text search over blog posts with highlighted snippets.
+
+On SQLite with FTS5 the index is the blog_post_fts virtual table, ranked
+by bm25 and excerpted with snippet()/highlight(). Elsewhere an in-process
+inverted index (PythonIndex) does the same job: BM25 over title and
+content tokens, built once per process and kept current from signals,
+with snippets cut from the matched posts only.
+
+Highlights are marked with control characters inside the index and only
+turned into <mark> tags after the surrounding text has been escaped.
+"""
+import math
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from studenthub.fts import WORD_RE, FullTextIndex, build_match_query, tokenize
+from .models import Post
+
+
+# bm25 column weights for (title, content)
+BM25_WEIGHTS = (5.0, 1.0)
+
+SEARCH_INDEX = FullTextIndex('blog_post_fts', 'blog_post', ('title', 'content'), BM25_WEIGHTS)
+
+# Words in a snippet around the first match
+SNIPPET_WORDS = 24
+
+MARK_START, MARK_END, ELLIPSIS = '\x02', '\x03', '…'
+
+
+def render_highlight(marked):
+    """Escape indexed text and turn the highlight markers into <mark> tags"""
+    html = escape(marked).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+    return mark_safe(html)
+
+
+def _fts_snippets(using, terms, pks):
+    table = SEARCH_INDEX.table
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, highlight({table}, 0, %s, %s), "
+            f"snippet({table}, 1, %s, %s, %s, %s) "
+            f"FROM {table} WHERE {table} MATCH %s AND rowid IN ({', '.join(['%s'] * len(pks))})",
+            [MARK_START, MARK_END, MARK_START, MARK_END, ELLIPSIS, SNIPPET_WORDS,
+             build_match_query(terms), *pks],
+        )
+        return {pk: (title, snippet) for pk, title, snippet in cursor.fetchall()}
+
+
+# Pure-Python fallback --------------------------------------------------------
+
+GENERATION_KEY = 'blog:search:generation'
+
+
+class PythonIndex:
+    """In-memory inverted index: token -> {post id: (title tf, content tf)}"""
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, rows=()):
+        self.postings = defaultdict(dict)
+        self.tokens = {}
+        self.lengths = {}
+        for pk, title, content in rows:
+            self._add(pk, title, content)
+        self.vocabulary = sorted(self.postings)
+
+    @classmethod
+    def load(cls):
+        return cls(Post.objects.order_by().values_list('pk', 'title', 'content').iterator())
+
+    def _add(self, pk, title, content):
+        title_counts = Counter(tokenize(title))
+        content_counts = Counter(tokenize(content))
+        self.tokens[pk] = title_counts.keys() | content_counts.keys()
+        for token in self.tokens[pk]:
+            self.postings[token][pk] = (title_counts[token], content_counts[token])
+        self.lengths[pk] = sum(title_counts.values()) * BM25_WEIGHTS[0] + sum(content_counts.values())
+
+    def remove(self, pk):
+        if self.lengths.pop(pk, None) is None:
+            return
+        for token in self.tokens.pop(pk):
+            del self.postings[token][pk]
+            if not self.postings[token]:
+                del self.postings[token]
+        self.vocabulary = sorted(self.postings)
+
+    def update(self, pk, title, content):
+        self.remove(pk)
+        self._add(pk, title, content)
+        self.vocabulary = sorted(self.postings)
+
+    def expand(self, word):
+        """Every indexed token starting with word"""
+        start = bisect_left(self.vocabulary, word)
+        end = bisect_left(self.vocabulary, word + '\U0010ffff', start)
+        return self.vocabulary[start:end]
+
+    def search(self, terms):
+        """Post ids matching every word as a prefix, best BM25 first"""
+        words = tokenize(terms)
+        if not words or not self.lengths:
+            return []
+        total = len(self.lengths)
+        average = sum(self.lengths.values()) / total
+        scores = None
+        for word in words:
+            word_scores = defaultdict(float)
+            for token in self.expand(word):
+                posts = self.postings[token]
+                idf = math.log(1 + (total - len(posts) + 0.5) / (len(posts) + 0.5))
+                for pk, (title_tf, content_tf) in posts.items():
+                    tf = BM25_WEIGHTS[0] * title_tf + content_tf
+                    norm = self.K1 * (1 - self.B + self.B * self.lengths[pk] / average)
+                    word_scores[pk] += idf * tf * (self.K1 + 1) / (tf + norm)
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {pk: score + word_scores[pk] for pk, score in scores.items() if pk in word_scores}
+            if not scores:
+                return []
+        return sorted(scores, key=lambda pk: (-scores[pk], -pk))
+
+
+def _matches(token, words):
+    return any(token.startswith(word) for word in words)
+
+
+def mark_words(text, words):
+    """Wrap every word of text matching a search prefix in highlight markers"""
+    return WORD_RE.sub(
+        lambda m: f'{MARK_START}{m.group()}{MARK_END}' if _matches(m.group().lower(), words) else m.group(),
+        text,
+    )
+
+
+def make_snippet(content, words, size=SNIPPET_WORDS):
+    """About size words of content around the first match, highlighted"""
+    spans = [m.span() for m in WORD_RE.finditer(content)]
+    if not spans:
+        return ''
+    first = next(
+        (i for i, (s, e) in enumerate(spans) if _matches(content[s:e].lower(), words)), 0
+    )
+    start = max(first - size // 3, 0)
+    end = min(start + size, len(spans))
+    begin = spans[start][0] if start else 0
+    finish = spans[end - 1][1] if end < len(spans) else len(content)
+    excerpt = mark_words(content[begin:finish].strip(), words)
+    return (ELLIPSIS if start else '') + excerpt + (ELLIPSIS if end < len(spans) else '')
+
+
+_lock = threading.Lock()
+_state = {'index': None, 'generation': None}
+
+
+def _generation():
+    return cache.get_or_set(GENERATION_KEY, 1, None)
+
+
+def get_python_index():
+    generation = _generation()
+    if _state['index'] is None or _state['generation'] != generation:
+        with _lock:
+            if _state['index'] is None or _state['generation'] != generation:
+                _state.update(index=PythonIndex.load(), generation=generation)
+    return _state['index']
+
+
+def _bump_generation():
+    try:
+        return cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+        return 1
+
+
+# Index maintenance and search --------------------------------------------------
+
+def _patch_python_index(change):
+    """Apply a change to this process's index; other processes rebuild theirs"""
+    generation = _bump_generation()
+    with _lock:
+        index = _state['index']
+        if index is None:
+            return
+        if _state['generation'] == generation - 1:
+            change(index)
+            _state['generation'] = generation
+        else:
+            # Missed another process's change: rebuild on the next search
+            _state['index'] = None
+
+
+def index_post(post, using='default'):
+    if SEARCH_INDEX.available(using):
+        SEARCH_INDEX.add(post, using)
+    else:
+        _patch_python_index(lambda index: index.update(post.pk, post.title, post.content))
+
+
+def unindex_post(pk, using='default'):
+    if SEARCH_INDEX.available(using):
+        SEARCH_INDEX.remove(pk, using)
+    else:
+        _patch_python_index(lambda index: index.remove(pk))
+
+
+def search_posts(queryset, terms):
+    """Filter a Post queryset by free text, ordered by relevance"""
+    using = queryset.db
+    if not tokenize(terms):
+        # Nothing the index can match, e.g. only punctuation
+        return queryset.filter(Q(title__icontains=terms) | Q(content__icontains=terms))
+    if SEARCH_INDEX.available(using):
+        return SEARCH_INDEX.search(queryset, terms)
+
+    ids = get_python_index().search(terms)
+    if not ids:
+        return queryset.none()
+    rank = Case(
+        *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(pk__in=ids).annotate(search_rank=rank).order_by('search_rank', '-created_at')
+
+
+def attach_snippets(posts, terms, using='default'):
+    """
+    Set search_title and search_snippet (safe HTML with <mark>ed matches)
+    on each post of a page of search results.
+    """
+    posts = list(posts)
+    if not posts:
+        return posts
+    pks = [post.pk for post in posts]
+    words = tokenize(terms)
+    if not words:
+        marked = {post.pk: (post.title, post.excerpt) for post in posts}
+    elif SEARCH_INDEX.available(using):
+        marked = _fts_snippets(using, terms, pks)
+    else:
+        contents = dict(Post.objects.filter(pk__in=pks).values_list('pk', 'content'))
+        marked = {
+            post.pk: (mark_words(post.title, words), make_snippet(contents.get(post.pk, ''), words))
+            for post in posts
+        }
+    for post in posts:
+        title, snippet = marked.get(post.pk, (post.title, ''))
+        post.search_title = render_highlight(title)
+        post.search_snippet = render_highlight(snippet)
+    return posts
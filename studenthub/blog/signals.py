@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from studenthub.feeds import mark_changed
+from .models import Post
+from .search import SEARCH_INDEX, index_post, unindex_post
+
+
+@receiver(post_save, sender=Post)
+def update_search_index(sender, instance, update_fields=None, using='default', **kwargs):
+    """Re-index a post when its title or content may have changed."""
+    if SEARCH_INDEX.covers(update_fields):
+        index_post(instance, using)
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_search_index(sender, instance, using='default', **kwargs):
+    """Drop a deleted post from the full-text index."""
+    unindex_post(instance.pk, using)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def expire_post_feeds(sender, **kwargs):
+    """Cached feeds and their ETags are stale once any post changes."""
+    mark_changed(Post)
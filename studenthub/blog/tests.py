@@ -0,0 +1,282 @@
+from io import StringIO
+from importlib.util import find_spec
+from unittest import mock, skipUnless
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from accounts.models import Profile
+from . import search
+from .rendering import renderer_version, sanitize_html
+from .models import Post, PostComment
+
+
+class PostCommentPaginationTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user(username='author', password='pass12345')
+        self.post = Post.objects.create(title='Exam tips', content='Sleep.', author=author)
+        self.commenters = [User.objects.create_user(username=f'c{n}') for n in range(3)]
+        for user in self.commenters:
+            Profile.objects.create(user=user)
+
+    def add_comments(self, count):
+        for n in range(count):
+            PostComment.objects.create(post=self.post, author=self.commenters[n % 3], text=f'comment {n}')
+
+    def detail(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('blog:post_detail', args=[self.post.pk]))
+        return response, len(queries)
+
+    def test_detail_queries_do_not_grow_with_comments(self):
+        self.add_comments(2)
+        _, few = self.detail()
+        self.add_comments(40)
+        response, many = self.detail()
+        self.assertEqual(few, many)
+        self.assertEqual(len(response.context['comments']), 20)
+
+    def test_load_more_returns_the_next_page(self):
+        self.add_comments(25)
+        first = self.detail()[0].context['comments']
+        data = self.client.get(
+            reverse('blog:post_comments', args=[self.post.pk]), {'cursor': first.next_cursor}
+        ).json()
+        self.assertEqual(data['html'].count('<h6'), 5)
+        self.assertIsNone(data['next_cursor'])
+        self.assertIn('comment 0', data['html'])
+        self.assertNotIn('comment 5<', data['html'])
+
+
+class PostSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='pass12345')
+
+    def post(self, title, content):
+        return Post.objects.create(title=title, content=content, author=self.author)
+
+    def search(self, terms):
+        return list(search.search_posts(Post.objects.all(), terms))
+
+    def test_ranked_prefix_search(self):
+        self.assertTrue(search.SEARCH_INDEX.available())
+        in_body = self.post('Week one', 'Revision timetable for calculus and algebra')
+        in_title = self.post('Calculus survival guide', 'Practice every day')
+        self.post('Cooking', 'Pasta recipes')
+        self.assertEqual(self.search('calc'), [in_title, in_body])
+        self.assertEqual(self.search('calculus algebra'), [in_body])
+
+    def test_index_follows_edits_and_deletes(self):
+        post = self.post('Hostel life', 'Laundry tips')
+        post.content = 'Kitchen tips'
+        post.save()
+        self.assertEqual(self.search('laundry'), [])
+        self.assertEqual(self.search('kitchen'), [post])
+        post.delete()
+        self.assertEqual(self.search('kitchen'), [])
+
+    def test_rebuild_command(self):
+        post = self.post('Graph theory', 'Notes')
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM blog_post_fts')
+        self.assertEqual(self.search('graph'), [])
+        call_command('rebuild_blog_search_index', stdout=StringIO())
+        self.assertEqual(self.search('graph'), [post])
+
+    def test_list_shows_escaped_highlighted_snippets(self):
+        self.post('Exam <b>tips</b>', 'Start early. ' * 30 + 'Sleep well before the exam. ' + 'Relax. ' * 30)
+        response = self.client.get(reverse('blog:post_list'), {'q': 'exam'})
+        self.assertContains(response, 'Exam &lt;b&gt;tips&lt;/b&gt;'.replace('Exam', '<mark>Exam</mark>'))
+        self.assertContains(response, 'before the <mark>exam</mark>')
+        self.assertContains(response, '…')
+        self.assertNotContains(response, 'Relax. ' * 20)
+
+    def test_search_is_lazy_and_filtered_first(self):
+        self.post('Calculus notes', 'Limits')
+        other = User.objects.create_user(username='other', password='pass12345')
+        mine = Post.objects.create(title='Calculator tips', content='Batteries', author=other)
+        with self.assertNumQueries(0):
+            results = search.search_posts(Post.objects.filter(author=other), 'calc')
+        self.assertEqual(list(results), [mine])
+        self.assertEqual(results.count(), 1)
+
+    def test_query_without_words(self):
+        post = self.post('C++ vs C#', 'Which one first?')
+        self.post('Exam tips', 'Sleep.')
+        response = self.client.get(reverse('blog:post_list'), {'q': '!!!'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['page_obj']), [])
+        response = self.client.get(reverse('blog:post_list'), {'q': '++'})
+        self.assertEqual(list(response.context['page_obj']), [post])
+        self.assertContains(response, 'Which one first?')
+
+    def test_python_fallback(self):
+        first = self.post('Calculus survival guide', 'Practice every day')
+        second = self.post('Week one', 'Revision timetable for calculus. <script>')
+        with mock.patch.object(search.SEARCH_INDEX, 'available', return_value=False):
+            self.assertEqual(self.search('calc'), [first, second])
+            third = self.post('Calculators allowed', 'In the exam')
+            self.assertEqual(self.search('calc'), [third, first, second])
+            third.delete()
+            self.assertEqual(self.search('calculators'), [])
+
+            response = self.client.get(reverse('blog:post_list'), {'q': 'calculus'})
+            self.assertContains(response, 'for <mark>calculus</mark>. &lt;script&gt;')
+
+    def test_python_index_snippet(self):
+        content = ' '.join(f'w{n}' for n in range(100)) + ' target ' + 'tail ' * 50
+        snippet = search.make_snippet(content, ['targ'])
+        self.assertTrue(snippet.startswith('…'))
+        self.assertTrue(snippet.endswith('…'))
+        self.assertIn(f'{search.MARK_START}target{search.MARK_END}', snippet)
+        self.assertEqual(len(search.tokenize(snippet)), search.SNIPPET_WORDS)
+
+
+class PostRenderingTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='pass12345')
+
+    def test_html_and_excerpt_stored_on_save(self):
+        post = Post.objects.create(
+            title='Notes', content='First <b>line</b> & more\n\n' + 'word ' * 40, author=self.author
+        )
+        self.assertIn('<p>First &lt;b&gt;line&lt;/b&gt; &amp; more</p>', post.content_html)
+        self.assertTrue(post.excerpt.startswith('First <b>line</b> & more word'))
+        self.assertTrue(post.excerpt.endswith('…'))
+        self.assertEqual(post.render_version, 'plain-1')
+
+        post.content = 'Changed'
+        post.save(update_fields=['content'])
+        post.refresh_from_db()
+        self.assertEqual(post.content_html, '<p>Changed</p>')
+        self.assertEqual(post.excerpt, 'Changed')
+
+    def test_migrated_posts_are_current(self):
+        # blog/migrations/0004 stamps the backfilled rows 'plain-1'
+        post = Post.objects.create(title='Notes', content='Hello', author=self.author)
+        Post.objects.filter(pk=post.pk).update(content_html='<p>Stored</p>', render_version='plain-1')
+        post.refresh_from_db()
+        self.assertEqual(post.rendered_content, '<p>Stored</p>')
+
+    def test_stale_render_served_without_writing(self):
+        post = Post.objects.create(title='Notes', content='Hello', author=self.author)
+        Post.objects.filter(pk=post.pk).update(content_html='old', render_version='plain-0')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('blog:post_detail', args=[post.pk]))
+        self.assertContains(response, '<p>Hello</p>')
+        self.assertFalse([q for q in queries if q['sql'].startswith('UPDATE') and 'content_html' in q['sql']])
+        post.refresh_from_db()
+        self.assertEqual((post.content_html, post.render_version), ('old', 'plain-0'))
+
+    def test_rerender_command_only_touches_stale_posts(self):
+        Post.objects.create(title='Fresh', content='Hello', author=self.author)
+        stale = Post.objects.create(title='Stale', content='World', author=self.author)
+        Post.objects.filter(pk=stale.pk).update(excerpt='', render_version='')
+        out = StringIO()
+        call_command('rerender_posts', stdout=out)
+        self.assertIn('Re-rendered 1 posts', out.getvalue())
+        stale.refresh_from_db()
+        self.assertEqual(stale.excerpt, 'World')
+        with override_settings(BLOG_MARKDOWN=True):
+            self.assertEqual(Post.objects.exclude(render_version=renderer_version()).count(), 2)
+
+    def test_sanitize_drops_unsafe_markup(self):
+        html = sanitize_html(
+            '<p><a href="javascript:alert(1)">x</a> <a href=" Java\tScript:alert(1)">y</a> '
+            '<a href="https://example.com/?a=1&amp;b=2" onclick="alert(1)">z</a> '
+            '<img src="data:image/svg+xml,x" alt="i"><a href="/blog/">w</a> &lt;b&gt;</p>'
+            '<script>alert(1)</script><iframe src="https://example.com"></iframe>'
+        )
+        self.assertEqual(
+            html,
+            '<p><a>x</a> <a>y</a> <a href="https://example.com/?a=1&amp;b=2">z</a> '
+            '<img alt="i"><a href="/blog/">w</a> &lt;b&gt;</p>alert(1)',
+        )
+
+    @skipUnless(find_spec('markdown'), 'needs the optional "markdown" package')
+    @override_settings(BLOG_MARKDOWN=True)
+    def test_markdown_links_are_sanitized(self):
+        post = Post.objects.create(
+            title='Links', content='**[x](javascript:alert(1))** [ok](https://example.com) <b>', author=self.author
+        )
+        self.assertEqual(post.render_version, 'markdown-3')
+        self.assertIn('<strong><a>x</a></strong>', post.content_html)
+        self.assertIn('<a href="https://example.com">ok</a>', post.content_html)
+        self.assertIn('&lt;b&gt;', post.content_html)
+
+
+    @skipUnless(find_spec('markdown'), 'needs the optional "markdown" package')
+    @override_settings(BLOG_MARKDOWN=True)
+    def test_markdown_code_is_escaped_once(self):
+        post = Post.objects.create(
+            title='Code', content='Use `a < b && c`.\n\n```\nif x < 1 && y:\n```\n\n<div>raw</div> &amp;', author=self.author
+        )
+        self.assertIn('<code>a &lt; b &amp;&amp; c</code>', post.content_html)
+        self.assertIn('if x &lt; 1 &amp;&amp; y:', post.content_html)
+        self.assertIn('&lt;div&gt;raw&lt;/div&gt; &amp;', post.content_html)
+        self.assertNotIn('<div>', post.content_html)
+    def test_list_does_not_load_post_bodies(self):
+        Post.objects.create(title='Notes', content='Body text here', author=self.author)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('blog:post_list'))
+        self.assertContains(response, 'Body text here')
+        post_queries = [q['sql'] for q in queries if 'FROM "blog_post"' in q['sql']]
+        self.assertTrue(post_queries)
+        for sql in post_queries:
+            self.assertNotIn('"blog_post"."content"', sql)
+
+
+class PostFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.post = Post.objects.create(title='Exam tips', content='Sleep <early>.', author=self.author)
+
+    def test_feeds_list_posts(self):
+        rss = self.client.get(reverse('blog:post_feed'))
+        self.assertEqual(rss['Content-Type'], 'application/rss+xml; charset=utf-8')
+        self.assertContains(rss, '<title>Exam tips</title>')
+        self.assertContains(rss, 'Sleep &amp;lt;early&amp;gt;.')
+        atom = self.client.get(reverse('blog:post_atom_feed'))
+        self.assertEqual(atom['Content-Type'], 'application/atom+xml; charset=utf-8')
+        self.assertContains(atom, f'http://testserver/blog/{self.post.pk}/')
+
+    def test_conditional_get_and_cache(self):
+        url = reverse('blog:post_feed')
+        first = self.client.get(url)
+        etag = first['ETag']
+        self.assertTrue(first.has_header('Last-Modified'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.content, first.content)
+        self.assertEqual(len(queries), 1)
+
+        Post.objects.create(title='Second post', content='More', author=self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Second post')
+
+        self.post.delete()
+        response = self.client.get(url)
+        self.assertNotContains(response, 'Exam tips')
+
+    def test_edit_changes_etag(self):
+        url = reverse('blog:post_feed')
+        first = self.client.get(url)
+        self.post.title = 'Exam tips, revised'
+        self.post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertContains(response, 'Exam tips, revised')
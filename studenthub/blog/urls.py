@@ -1,11 +1,15 @@
 from django.urls import path
 from . import views
+from .feeds import LatestPostsFeed, LatestPostsAtomFeed
 
 app_name = 'blog'
 
 urlpatterns = [
     path('', views.post_list, name='post_list'),
+    path('feed/', LatestPostsFeed(), name='post_feed'),
+    path('feed/atom/', LatestPostsAtomFeed(), name='post_atom_feed'),
     path('new/', views.post_create, name='post_create'),
     path('<int:pk>/', views.post_detail, name='post_detail'),
+    path('<int:pk>/comments/', views.post_comments, name='post_comments'),
     path('<int:pk>/comment/', views.add_post_comment, name='add_post_comment'),
 ]
@@ -1,48 +1,80 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
 from django.core.paginator import Paginator
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+from studenthub.pagination import comment_page
+from studenthub.viewcounts import record_view
 from .models import Post, PostComment
 from .forms import PostForm, PostCommentForm
+from .search import attach_snippets, search_posts
+
+
+SORT_ORDERS = {
+    'newest': ('-created_at',),
+    'most_viewed': ('-view_count', '-created_at'),
+}
 
 
 def post_list(request):
-    posts = Post.objects.all()
+    sort = request.GET.get('sort')
+    if sort not in SORT_ORDERS:
+        sort = 'newest'
+    # Cards show the stored excerpt, so never load the post bodies
+    posts = Post.objects.defer('content', 'content_html').order_by(*SORT_ORDERS[sort])
     
-    # Search functionality
+    # Search functionality: ranked full-text matches, shown as snippets so
+    # the post bodies never need to be loaded
     query = request.GET.get('q')
     if query:
-        posts = posts.filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query)
-        )
+        posts = search_posts(posts, query)
     
     # Pagination
     paginator = Paginator(posts, 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    if query:
+        page_obj.object_list = attach_snippets(page_obj.object_list, query, posts.db)
+    
+    # Active search and sort, for building page links
+    filter_query = request.GET.copy()
+    filter_query.pop('page', None)
     
     context = {
         'page_obj': page_obj,
         'query': query,
+        'sort': sort,
+        'filter_query': filter_query.urlencode(),
     }
     return render(request, 'blog/post_list.html', context)
 
 
 def post_detail(request, pk):
     post = get_object_or_404(Post, pk=pk)
-    comments = post.comments.all()
+    record_view(post)
+    comments = comment_page(request, post.comments.all())
     comment_form = PostCommentForm()
     
+    recent_posts = post.author.posts.exclude(pk=post.pk).defer('content', 'content_html')[:4]
+    
     context = {
         'post': post,
         'comments': comments,
         'comment_form': comment_form,
+        'recent_posts': recent_posts,
     }
     return render(request, 'blog/post_detail.html', context)
 
 
+def post_comments(request, pk):
+    """The next page of comments as an HTML fragment plus the cursor after it"""
+    post = get_object_or_404(Post.objects.only('pk'), pk=pk)
+    comments = comment_page(request, post.comments.all())
+    html = render_to_string('includes/comments.html', {'comments': comments}, request=request)
+    return JsonResponse({'html': html, 'next_cursor': comments.next_cursor})
+
+
 @login_required
 def post_create(request):
     if request.method == 'POST':
@@ -1,5 +1,18 @@
 from django.contrib import admin
-from .models import Expense
+from django.db.models import Count
+from .models import Expense, ExpenseShare
+
+
+class ExpenseShareInline(admin.TabularInline):
+    model = ExpenseShare
+    fields = ('participant', 'amount')
+    readonly_fields = ('participant', 'amount')
+    extra = 0
+    can_delete = False
+    
+    def has_add_permission(self, request, obj=None):
+        # Shares are split from the participants on save
+        return False
 
 
 @admin.register(Expense)
@@ -9,7 +22,13 @@ class ExpenseAdmin(admin.ModelAdmin):
     search_fields = ('title', 'payer__username')
     date_hierarchy = 'created_at'
     filter_horizontal = ('participants',)
+    inlines = [ExpenseShareInline]
+    
+    def get_queryset(self, request):
+        # One share per participant, counted in the changelist query itself
+        return super().get_queryset(request).annotate(share_count=Count('shares'))
     
     def participant_count(self, obj):
-        return obj.participant_count
+        return obj.share_count
     participant_count.short_description = 'Participants'
+    participant_count.admin_order_field = 'share_count'
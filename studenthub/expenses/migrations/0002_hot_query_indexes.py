@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['payer', 'amount'], name='expense_payer_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['payer', '-created_at'], name='expense_payer_created_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from collections import defaultdict
+from decimal import Decimal
+
+
+CENT = Decimal('0.01')
+
+
+def split_amount(amount, count):
+    # Frozen copy of expenses.models.split_amount at the time of this migration
+    if count <= 0:
+        return []
+    base, extra = divmod(int(amount.quantize(CENT) / CENT), count)
+    return [(base + (index < extra)) * CENT for index in range(count)]
+
+
+def populate_shares(apps, schema_editor):
+    Expense = apps.get_model('expenses', 'Expense')
+    ExpenseShare = apps.get_model('expenses', 'ExpenseShare')
+    participants = defaultdict(list)
+    rows = Expense.participants.through.objects.order_by('expense_id', 'user_id')
+    for expense_id, user_id in rows.values_list('expense_id', 'user_id').iterator():
+        participants[expense_id].append(user_id)
+    shares = [
+        ExpenseShare(expense_id=pk, participant_id=user_id, amount=share)
+        for pk, amount in Expense.objects.values_list('pk', 'amount').iterator()
+        for user_id, share in zip(participants[pk], split_amount(amount, len(participants[pk])))
+    ]
+    ExpenseShare.objects.bulk_create(shares, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('expenses', '0002_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseShare',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('expense', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shares', to='expenses.expense')),
+                ('participant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expense_shares', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('participant', 'expense')},
+            },
+        ),
+        migrations.RunPython(populate_shares, migrations.RunPython.noop),
+    ]
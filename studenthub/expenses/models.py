@@ -1,8 +1,24 @@
-from django.db import models
+from collections import defaultdict
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.utils.functional import cached_property
 from decimal import Decimal
 
 
+CENT = Decimal('0.01')
+
+
+def split_amount(amount, count):
+    """
+    Divide amount into count shares that add up to it exactly: equal to the
+    cent, with the leftover cents going one each to the first shares.
+    """
+    if count <= 0:
+        return []
+    base, extra = divmod(int(amount.quantize(CENT) / CENT), count)
+    return [(base + (index < extra)) * CENT for index in range(count)]
+
+
 class Expense(models.Model):
     payer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='expenses_paid')
     title = models.CharField(max_length=200)
@@ -10,16 +26,52 @@ class Expense(models.Model):
     participants = models.ManyToManyField(User, related_name='expenses_shared')
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            # Covers the SUM(amount) of everything a user has paid
+            models.Index(fields=['payer', 'amount'], name='expense_payer_amount_idx'),
+            models.Index(fields=['payer', '-created_at'], name='expense_payer_created_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.title} - ${self.amount}"
     
-    def per_head(self):
-        """Calculate amount per person"""
-        participant_count = self.participants.count()
-        if participant_count > 0:
-            return self.amount / participant_count
-        return Decimal('0.00')
+    @classmethod
+    def write_shares(cls, pks):
+        """Rewrite the ExpenseShare rows of the given expenses from their amount and participants"""
+        pks = list(pks)
+        participants = defaultdict(list)
+        rows = cls.participants.through.objects.filter(expense_id__in=pks).order_by('user_id')
+        for expense_id, user_id in rows.values_list('expense_id', 'user_id'):
+            participants[expense_id].append(user_id)
+        shares = [
+            ExpenseShare(expense_id=pk, participant_id=user_id, amount=share)
+            for pk, amount in cls.objects.filter(pk__in=pks).values_list('pk', 'amount')
+            for user_id, share in zip(participants[pk], split_amount(amount, len(participants[pk])))
+        ]
+        with transaction.atomic():
+            ExpenseShare.objects.filter(expense_id__in=pks).delete()
+            ExpenseShare.objects.bulk_create(shares)
+    
+    @cached_property
+    def share_list(self):
+        """Shares with their participants; served from the prefetch cache when there is one"""
+        return list(self.shares.all())
     
     @property
     def participant_count(self):
-        return self.participants.count()
+        return len(self.share_list)
+
+
+class ExpenseShare(models.Model):
+    """What one participant owes towards an expense, written from signals"""
+    expense = models.ForeignKey(Expense, on_delete=models.CASCADE, related_name='shares')
+    participant = models.ForeignKey(User, on_delete=models.CASCADE, related_name='expense_shares')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    
+    class Meta:
+        # Leads with participant for the per-user balance SUM
+        unique_together = ('participant', 'expense')
+    
+    def __str__(self):
+        return f"{self.participant.username} owes ${self.amount} for {self.expense.title}"
@@ -0,0 +1,31 @@
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+from .models import Expense
+
+
+@receiver(m2m_changed, sender=Expense.participants.through)
+def update_shares(sender, instance, action, reverse, pk_set, **kwargs):
+    """Re-split every expense whose participants were added, removed or cleared."""
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        if action != 'pre_clear':
+            Expense.write_shares([instance.pk])
+        return
+    # user.expenses_shared: clearing needs the affected ids before they go
+    if action == 'pre_clear':
+        instance._cleared_expenses = list(
+            sender.objects.filter(user=instance).values_list('expense_id', flat=True)
+        )
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_expenses', [])
+    if pk_set:
+        Expense.write_shares(pk_set)
+
+
+@receiver(post_save, sender=Expense)
+def resplit_changed_expense(sender, instance, created, **kwargs):
+    """An edited amount changes every share; a new expense has no participants yet."""
+    if not created:
+        Expense.write_shares([instance.pk])
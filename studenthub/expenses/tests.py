@@ -0,0 +1,87 @@
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from accounts.models import Profile
+from .models import Expense, ExpenseShare, split_amount
+
+
+class SplitAmountTests(TestCase):
+    def test_shares_add_up_to_the_amount(self):
+        self.assertEqual(split_amount(Decimal('10.00'), 3), [Decimal('3.34'), Decimal('3.33'), Decimal('3.33')])
+        self.assertEqual(split_amount(Decimal('0.01'), 2), [Decimal('0.01'), Decimal('0.00')])
+        self.assertEqual(split_amount(Decimal('9.00'), 0), [])
+
+
+class ExpenseShareTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f'u{n}', password='pass12345') for n in range(3)]
+        for user in self.users:
+            Profile.objects.create(user=user)
+
+    def shares(self, expense):
+        return dict(expense.shares.values_list('participant__username', 'amount'))
+
+    def expense(self, amount, payer, participants):
+        expense = Expense.objects.create(title='Groceries', amount=Decimal(amount), payer=payer)
+        expense.participants.set(participants)
+        return expense
+
+    def test_shares_follow_participants_and_amount(self):
+        expense = self.expense('10.00', self.users[0], self.users)
+        self.assertEqual(self.shares(expense), {
+            'u0': Decimal('3.34'), 'u1': Decimal('3.33'), 'u2': Decimal('3.33'),
+        })
+        expense.participants.remove(self.users[2])
+        self.assertEqual(self.shares(expense), {'u0': Decimal('5.00'), 'u1': Decimal('5.00')})
+        expense.amount = Decimal('7.00')
+        expense.save()
+        self.assertEqual(self.shares(expense), {'u0': Decimal('3.50'), 'u1': Decimal('3.50')})
+        self.users[1].expenses_shared.clear()
+        self.assertEqual(self.shares(expense), {'u0': Decimal('7.00')})
+
+    def test_create_view_writes_shares(self):
+        self.client.login(username='u0', password='pass12345')
+        self.client.post(reverse('expenses:expense_create'), {
+            'title': 'Pizza', 'amount': '20.00', 'participants': [user.pk for user in self.users[:2]],
+        })
+        expense = Expense.objects.get(title='Pizza')
+        self.assertEqual(self.shares(expense), {'u0': Decimal('10.00'), 'u1': Decimal('10.00')})
+
+    def test_list_balances_in_constant_queries(self):
+        self.client.login(username='u1', password='pass12345')
+        self.expense('9.00', self.users[0], self.users)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('expenses:expense_list'))
+        few = len(queries)
+        self.assertEqual(response.context['total_owes'], Decimal('3.00'))
+
+        self.expense('10.00', self.users[0], self.users)
+        self.expense('4.00', self.users[1], self.users[:2])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('expenses:expense_list'))
+        self.assertEqual(len(queries), few)
+        self.assertEqual(response.context['total_owes'], Decimal('6.33'))
+        self.assertEqual(response.context['total_paid'], Decimal('4.00'))
+        self.assertEqual(
+            [expense.your_share for expense in response.context['expenses']],
+            [Decimal('2.00'), Decimal('3.33'), Decimal('3.00')],
+        )
+
+    def test_admin_list_counts_participants_in_constant_queries(self):
+        User.objects.create_superuser(username='admin', password='pass12345')
+        self.client.login(username='admin', password='pass12345')
+        self.expense('9.00', self.users[0], self.users)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('admin:expenses_expense_changelist'))
+        few = len(queries)
+
+        self.expense('4.00', self.users[1], self.users[:2])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:expenses_expense_changelist'))
+        self.assertEqual(len(queries), few)
+        self.assertEqual(
+            sorted(expense.share_count for expense in response.context['cl'].result_list), [2, 3]
+        )
@@ -1,24 +1,36 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Sum, Q
-from .models import Expense
+from django.db.models import OuterRef, Prefetch, Subquery, Sum
+from .models import Expense, ExpenseShare
 from .forms import ExpenseForm
 
 
 @login_required
 def expense_list(request):
-    # Get all expenses where current user is a participant
-    user_expenses = Expense.objects.filter(participants=request.user).order_by('-created_at')
+    # Get all expenses where current user is a participant, with their own
+    # share and everyone's shares read from the ledger
+    your_share = ExpenseShare.objects.filter(
+        expense=OuterRef('pk'), participant=request.user
+    ).values('amount')
+    user_expenses = (
+        Expense.objects.filter(participants=request.user)
+        .select_related('payer__profile')
+        .prefetch_related(Prefetch(
+            'shares', queryset=ExpenseShare.objects.select_related('participant').order_by('participant__username')
+        ))
+        .annotate(your_share=Subquery(your_share))
+        .order_by('-created_at')
+    )
     
     # Calculate net balance
     total_paid = Expense.objects.filter(payer=request.user).aggregate(
         total=Sum('amount')
     )['total'] or 0
     
-    total_owes = 0
-    for expense in Expense.objects.filter(participants=request.user).exclude(payer=request.user):
-        total_owes += expense.per_head()
+    total_owes = ExpenseShare.objects.filter(participant=request.user).exclude(
+        expense__payer=request.user
+    ).aggregate(total=Sum('amount'))['total'] or 0
     
     net_balance = total_paid - total_owes
     
@@ -1,12 +1,12 @@
 from django.contrib import admin
-from .models import Request, RequestOffer, RequestFulfillment
+from .models import Request, RequestOffer, RequestFulfillment, RequestDailyStat
 
 
 @admin.register(Request)
 class RequestAdmin(admin.ModelAdmin):
     list_display = [
         'title', 'requester', 'category', 'fee', 'status', 
-        'is_urgent', 'location', 'created_at'
+        'is_urgent', 'location', 'offer_count', 'pending_offer_count', 'created_at'
     ]
     list_filter = [
         'status', 'category', 'is_urgent', 'contact_preference',
@@ -15,7 +15,7 @@ class RequestAdmin(admin.ModelAdmin):
     search_fields = ['title', 'description', 'requester__username', 'location']
     date_hierarchy = 'created_at'
     list_editable = ['status', 'is_urgent']
-    readonly_fields = ['created_at', 'updated_at', 'total_offers']
+    readonly_fields = ['created_at', 'updated_at', 'offer_count', 'pending_offer_count', 'view_count']
     
     fieldsets = (
         ('Basic Information', {
@@ -29,14 +29,10 @@ class RequestAdmin(admin.ModelAdmin):
             'description': 'Provide contact details based on preference'
         }),
         ('Status & Metadata', {
-            'fields': ('status', 'created_at', 'updated_at'),
+            'fields': ('status', 'offer_count', 'pending_offer_count', 'created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
     )
-    
-    def total_offers(self, obj):
-        return obj.total_offers
-    total_offers.short_description = 'Total Offers'
 
 
 @admin.register(RequestOffer)
@@ -92,3 +88,11 @@ class RequestFulfillmentAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(RequestDailyStat)
+class RequestDailyStatAdmin(admin.ModelAdmin):
+    list_display = ['date', 'category', 'status', 'request_count', 'fee_total']
+    list_filter = ['category', 'status']
+    date_hierarchy = 'date'
+    readonly_fields = ['date', 'category', 'status', 'request_count', 'fee_total']
@@ -5,3 +5,6 @@ class RequestsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'requests'
     verbose_name = 'Student Requests'
+
+    def ready(self):
+        from . import signals  # noqa: F401
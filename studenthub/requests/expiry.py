@@ -0,0 +1,63 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import connection, transaction
+from django.utils import timezone
+from .facets import invalidate_facets
+from .models import Request, RequestDailyStat, RequestOffer
+
+
+def expire_batch(batch_size=500, now=None):
+    """
+    Cancel up to batch_size open requests whose deadline has passed and
+    withdraw their pending offers. Returns the number of requests cancelled.
+
+    The candidates come from the (status, deadline) index, so a sweep only
+    touches the rows it changes.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        candidates = Request.objects.filter(status='open', deadline__lt=now).order_by('deadline')
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        batch = list(candidates.values('pk', 'created_at', 'category', 'fee')[:batch_size])
+        if not batch:
+            return 0
+
+        ids = [row['pk'] for row in batch]
+        expired = Request.objects.filter(pk__in=ids, status='open').update(
+            status='cancelled', pending_offer_count=0, updated_at=now
+        )
+        if expired != len(batch):
+            # Some requests changed underneath us; keep only the ones we cancelled
+            batch = list(Request.objects.filter(
+                pk__in=ids, status='cancelled', updated_at=now
+            ).values('pk', 'created_at', 'category', 'fee'))
+            ids = [row['pk'] for row in batch]
+
+        RequestOffer.objects.filter(request_id__in=ids, status='pending').update(
+            status='withdrawn', updated_at=now
+        )
+
+        # Bulk UPDATEs skip the Request signals, so move the rollup buckets here
+        buckets = defaultdict(lambda: [0, Decimal('0.00')])
+        for row in batch:
+            bucket = buckets[(timezone.localdate(row['created_at']), row['category'])]
+            bucket[0] += 1
+            bucket[1] += row['fee']
+        for (date, category), (count, fee) in buckets.items():
+            RequestDailyStat.record((date, category, 'open'), -count, -fee)
+            RequestDailyStat.record((date, category, 'cancelled'), count, fee)
+
+        if batch:
+            transaction.on_commit(invalidate_facets)
+    return len(batch)
+
+
+def expire_overdue_requests(batch_size=500, now=None):
+    """Run batches until no overdue open requests remain; returns the total"""
+    total = 0
+    while True:
+        expired = expire_batch(batch_size, now)
+        total += expired
+        if expired < batch_size:
+            return total
@@ -0,0 +1,88 @@
+import hashlib
+from decimal import Decimal
+from django.core.cache import cache
+from django.db.models import Count, Q
+from .models import Request
+
+
+CACHE_TIMEOUT = 60 * 10
+GENERATION_KEY = 'requests:facets:generation'
+
+# (key, label, lower bound inclusive, upper bound exclusive)
+FEE_BUCKETS = [
+    ('under_10', 'Under $10', None, Decimal('10')),
+    ('10_25', '$10 - $25', Decimal('10'), Decimal('25')),
+    ('25_50', '$25 - $50', Decimal('25'), Decimal('50')),
+    ('50_100', '$50 - $100', Decimal('50'), Decimal('100')),
+    ('100_plus', '$100+', Decimal('100'), None),
+]
+
+
+def _fee_bucket_q(low, high):
+    q = Q()
+    if low is not None:
+        q &= Q(fee__gte=low)
+    if high is not None:
+        q &= Q(fee__lt=high)
+    return q
+
+
+def _aggregates():
+    aggregates = {
+        'total': Count('pk'),
+        'open': Count('pk', filter=Q(status='open')),
+        'urgent': Count('pk', filter=Q(status='open', is_urgent=True)),
+    }
+    for value, _ in Request.CATEGORY_CHOICES:
+        aggregates[f'category__{value}'] = Count('pk', filter=Q(category=value))
+    for value, _ in Request.STATUS_CHOICES:
+        aggregates[f'status__{value}'] = Count('pk', filter=Q(status=value))
+    for key, _, low, high in FEE_BUCKETS:
+        aggregates[f'fee__{key}'] = Count('pk', filter=_fee_bucket_q(low, high))
+    return aggregates
+
+
+def compute_facets(queryset):
+    """Count totals and every facet for a queryset in a single aggregate query"""
+    row = queryset.order_by().aggregate(**_aggregates())
+    return {
+        'total': row['total'],
+        'open': row['open'],
+        'urgent': row['urgent'],
+        'categories': [
+            {'value': value, 'label': label, 'count': row[f'category__{value}']}
+            for value, label in Request.CATEGORY_CHOICES
+        ],
+        'statuses': [
+            {'value': value, 'label': label, 'count': row[f'status__{value}']}
+            for value, label in Request.STATUS_CHOICES
+        ],
+        'fee_buckets': [
+            {'value': key, 'label': label, 'count': row[f'fee__{key}']}
+            for key, label, _, _ in FEE_BUCKETS
+        ],
+    }
+
+
+def _generation():
+    return cache.get_or_set(GENERATION_KEY, 1, None)
+
+
+def invalidate_facets():
+    """Drop every cached facet result; call after any write to Request"""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+def get_facets(form, queryset):
+    """Facet counts for a bound RequestFilterForm, cached by filter signature"""
+    signature = form.signature() if form.is_valid() else ''
+    digest = hashlib.sha1(signature.encode()).hexdigest()
+    key = f'requests:facets:{_generation()}:{digest}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset)
+        cache.set(key, facets, CACHE_TIMEOUT)
+    return facets
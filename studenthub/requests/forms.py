@@ -1,6 +1,7 @@
 from django import forms
 from django.utils import timezone
 from .models import Request, RequestOffer
+from .search import search_requests
 
 
 class RequestForm(forms.ModelForm):
@@ -204,3 +205,43 @@ class RequestFilterForm(forms.Form):
             'placeholder': 'Search requests...'
         })
     )
+    sort = forms.ChoiceField(
+        choices=[('newest', 'Newest'), ('most_viewed', 'Most viewed')],
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    
+    # Ordering only, so not part of the facet signature
+    ORDERING_FIELDS = ('sort',)
+    
+    def filter_queryset(self, queryset):
+        """Narrow a Request queryset down to the cleaned filter values"""
+        data = self.cleaned_data
+        if data.get('category'):
+            queryset = queryset.filter(category=data['category'])
+        if data.get('status'):
+            queryset = queryset.filter(status=data['status'])
+        if data.get('min_fee') is not None:
+            queryset = queryset.filter(fee__gte=data['min_fee'])
+        if data.get('max_fee') is not None:
+            queryset = queryset.filter(fee__lte=data['max_fee'])
+        if data.get('is_urgent'):
+            queryset = queryset.filter(is_urgent=True)
+        if data.get('search'):
+            queryset = search_requests(queryset, data['search'])
+        return queryset
+    
+    def signature(self):
+        """Normalized, order-independent key for the active filters"""
+        data = self.cleaned_data
+        parts = []
+        for name in sorted(self.fields):
+            value = data.get(name)
+            if name in self.ORDERING_FIELDS or value in (None, '', False):
+                continue
+            if name == 'search':
+                value = ' '.join(value.lower().split())
+            elif name in ('min_fee', 'max_fee'):
+                value = value.normalize()
+            parts.append(f'{name}={value}')
+        return '&'.join(parts)
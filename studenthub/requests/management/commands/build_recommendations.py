@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from requests.recommendations import TOP_N, rebuild_recommendations, refresh_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Precompute the "recommended for you" request lists shown on the request list'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Only score requests opened since the last run and drop closed ones'
+        )
+        parser.add_argument('--top', type=int, default=TOP_N, help='Recommendations to keep per user')
+
+    def handle(self, *args, **options):
+        if options['incremental']:
+            removed, added = refresh_recommendations(options['top'])
+            self.stdout.write(
+                self.style.SUCCESS(f'Added {added} and removed {removed} recommendations.')
+            )
+        else:
+            users, rows = rebuild_recommendations(options['top'])
+            self.stdout.write(
+                self.style.SUCCESS(f'Built {rows} recommendations for {users} users.')
+            )
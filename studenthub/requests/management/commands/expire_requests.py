@@ -0,0 +1,26 @@
+import time
+from django.core.management.base import BaseCommand
+from requests.expiry import expire_overdue_requests
+
+
+class Command(BaseCommand):
+    help = 'Cancel open requests whose deadline has passed and withdraw their pending offers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Requests to cancel per transaction')
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping until interrupted')
+        parser.add_argument('--interval', type=int, default=60, help='Seconds between sweeps with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            expired = expire_overdue_requests(options['batch_size'])
+            if expired or not options['loop']:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Cancelled {expired} expired requests.')
+                )
+            if not options['loop']:
+                return
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                return
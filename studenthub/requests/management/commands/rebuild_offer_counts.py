@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from requests.models import Request, RequestOffer
+
+
+class Command(BaseCommand):
+    help = 'Recalculate the denormalized offer counters on every request'
+
+    def handle(self, *args, **options):
+        offers = RequestOffer.objects.filter(request=OuterRef('pk')).order_by().values('request')
+        offer_count = Coalesce(Subquery(offers.annotate(n=Count('pk')).values('n')), 0)
+        pending_count = Coalesce(
+            Subquery(offers.filter(status='pending').annotate(n=Count('pk')).values('n')), 0
+        )
+        
+        with transaction.atomic():
+            stale = Request.objects.exclude(
+                offer_count=offer_count,
+                pending_offer_count=pending_count,
+            ).count()
+            Request.objects.update(
+                offer_count=offer_count,
+                pending_offer_count=pending_count,
+            )
+        
+        if stale:
+            self.stdout.write(f'Corrected offer counters on {stale} requests.')
+        self.stdout.write(
+            self.style.SUCCESS('Offer counters are up to date.')
+        )
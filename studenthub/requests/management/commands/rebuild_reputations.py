@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from requests.reputation import rebuild_reputations
+
+
+class Command(BaseCommand):
+    help = 'Recompute fulfiller reputation records from completed fulfillments'
+
+    def handle(self, *args, **options):
+        count = rebuild_reputations()
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt reputation for {count} fulfillers.')
+        )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from requests.search import SEARCH_INDEX
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the SQLite FTS5 full-text index used by request search'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias to rebuild')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if connections[using].vendor != 'sqlite':
+            self.stdout.write('Full-text index is only used on SQLite; nothing to do.')
+            return
+        
+        try:
+            SEARCH_INDEX.create(using)
+        except OperationalError as exc:
+            raise CommandError(f'This SQLite build does not support FTS5: {exc}')
+        
+        count = SEARCH_INDEX.rebuild(using)
+        self.stdout.write(
+            self.style.SUCCESS(f'Indexed {count} requests.')
+        )
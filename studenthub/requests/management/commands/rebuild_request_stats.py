@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from requests.stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily request statistics rollup from the requests table'
+
+    def handle(self, *args, **options):
+        rows = rebuild_daily_stats()
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {rows} daily statistics rows.')
+        )
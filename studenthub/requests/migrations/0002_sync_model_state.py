@@ -0,0 +1,105 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:11
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_fulfiller_from_offer(apps, schema_editor):
+    RequestFulfillment = apps.get_model('requests', 'RequestFulfillment')
+    for fulfillment in RequestFulfillment.objects.select_related('offer'):
+        fulfillment.fulfiller_id = fulfillment.offer.fulfiller_id
+        fulfillment.save(update_fields=['fulfiller'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('requests', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='request',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.AlterModelOptions(
+            name='requestfulfillment',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.AlterModelOptions(
+            name='requestoffer',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.RemoveField(
+            model_name='requestfulfillment',
+            name='status',
+        ),
+        migrations.RemoveField(
+            model_name='requestfulfillment',
+            name='updated_at',
+        ),
+        migrations.AddField(
+            model_name='request',
+            name='email',
+            field=models.EmailField(blank=True, help_text='Your email address for contact', max_length=254),
+        ),
+        migrations.AddField(
+            model_name='request',
+            name='phone',
+            field=models.CharField(blank=True, help_text='Your phone number for contact', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='requestfulfillment',
+            name='fulfiller',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='fulfillments', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(copy_fulfiller_from_offer, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='requestfulfillment',
+            name='fulfiller',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fulfillments', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='request',
+            name='category',
+            field=models.CharField(choices=[('books', 'Books'), ('electronics', 'Electronics'), ('food', 'Food & Drinks'), ('transport', 'Transport'), ('services', 'Services'), ('other', 'Other')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='request',
+            name='contact_preference',
+            field=models.CharField(choices=[('email', 'Email'), ('phone', 'Phone'), ('both', 'Both')], default='email', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='request',
+            name='fee',
+            field=models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(0.01)]),
+        ),
+        migrations.AlterField(
+            model_name='request',
+            name='location',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='request',
+            name='requester',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='requests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='requestfulfillment',
+            name='offer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fulfillment', to='requests.requestoffer'),
+        ),
+        migrations.AlterField(
+            model_name='requestfulfillment',
+            name='request',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fulfillments', to='requests.request'),
+        ),
+        migrations.AlterField(
+            model_name='requestoffer',
+            name='proposed_fee',
+            field=models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(0.01)]),
+        ),
+    ]
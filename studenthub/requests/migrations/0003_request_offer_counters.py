@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:11
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_offer_counts(apps, schema_editor):
+    Request = apps.get_model('requests', 'Request')
+    RequestOffer = apps.get_model('requests', 'RequestOffer')
+    offers = RequestOffer.objects.filter(request=OuterRef('pk')).order_by().values('request')
+    Request.objects.update(
+        offer_count=Coalesce(Subquery(offers.annotate(n=Count('pk')).values('n')), 0),
+        pending_offer_count=Coalesce(
+            Subquery(offers.filter(status='pending').annotate(n=Count('pk')).values('n')), 0
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('requests', '0002_sync_model_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='request',
+            name='offer_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='request',
+            name='pending_offer_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_offer_counts, migrations.RunPython.noop),
+    ]
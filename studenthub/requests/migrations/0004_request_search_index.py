@@ -0,0 +1,37 @@
+from django.db import migrations, OperationalError
+
+
+FTS_TABLE = 'requests_request_fts'
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "title, description, location, tokenize='unicode61 remove_diacritics 2')"
+        )
+    except OperationalError:
+        # SQLite built without FTS5; search falls back to icontains
+        return
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, title, description, location) "
+        "SELECT id, title, description, location FROM requests_request"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('requests', '0003_request_offer_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:15
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_stats(apps, schema_editor):
+    Request = apps.get_model('requests', 'Request')
+    RequestDailyStat = apps.get_model('requests', 'RequestDailyStat')
+    rows = (
+        Request.objects.order_by()
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'category', 'status')
+        .annotate(request_count=Count('pk'), fee_total=Sum('fee'))
+    )
+    RequestDailyStat.objects.bulk_create([
+        RequestDailyStat(
+            date=row['day'], category=row['category'], status=row['status'],
+            request_count=row['request_count'], fee_total=row['fee_total'],
+        )
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('requests', '0004_request_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('category', models.CharField(choices=[('books', 'Books'), ('electronics', 'Electronics'), ('food', 'Food & Drinks'), ('transport', 'Transport'), ('services', 'Services'), ('other', 'Other')], max_length=20)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('request_count', models.IntegerField(default=0)),
+                ('fee_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+            ],
+            options={
+                'ordering': ['-date', 'category', 'status'],
+                'unique_together': {('date', 'category', 'status')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
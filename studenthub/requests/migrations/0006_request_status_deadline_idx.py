@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('requests', '0005_request_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['status', 'deadline'], name='request_status_deadline_idx'),
+        ),
+    ]
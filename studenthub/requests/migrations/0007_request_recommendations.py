@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('requests', '0006_request_status_deadline_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category_weights', models.JSONField(default=dict)),
+                ('locations', models.JSONField(default=list)),
+                ('fee_median', models.FloatField(default=0)),
+                ('fee_spread', models.FloatField(default=1)),
+                ('scored_until', models.DateTimeField(help_text='Open requests created before this have been scored')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='recommendation_profile', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RequestRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='requests.request')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='request_recommendations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['user', '-score'], name='recommendation_user_score_idx')],
+                'unique_together': {('user', 'request')},
+            },
+        ),
+    ]
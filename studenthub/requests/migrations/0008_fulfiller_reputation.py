@@ -0,0 +1,67 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Avg, Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_reputations(apps, schema_editor):
+    RequestFulfillment = apps.get_model('requests', 'RequestFulfillment')
+    FulfillerReputation = apps.get_model('requests', 'FulfillerReputation')
+    rows = (
+        RequestFulfillment.objects.filter(completion_date__isnull=False)
+        .order_by()
+        .values('fulfiller')
+        .annotate(
+            completed_count=Count('pk'),
+            rating_count=Count('rating'),
+            rating_total=Coalesce(Sum('rating'), 0),
+            average_rating=Avg('rating'),
+            timed_count=Count('pk', filter=Q(offer__estimated_delivery__isnull=False)),
+            on_time_count=Count('pk', filter=Q(completion_date__lte=F('offer__estimated_delivery'))),
+        )
+    )
+    FulfillerReputation.objects.bulk_create([
+        FulfillerReputation(
+            user_id=row['fulfiller'],
+            completed_count=row['completed_count'],
+            rating_count=row['rating_count'],
+            rating_total=row['rating_total'],
+            average_rating=row['average_rating'],
+            timed_count=row['timed_count'],
+            on_time_count=row['on_time_count'],
+            on_time_rate=row['on_time_count'] / row['timed_count'] if row['timed_count'] else None,
+        )
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('requests', '0007_request_recommendations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FulfillerReputation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('rating_total', models.PositiveIntegerField(default=0)),
+                ('average_rating', models.FloatField(blank=True, null=True)),
+                ('timed_count', models.PositiveIntegerField(default=0)),
+                ('on_time_count', models.PositiveIntegerField(default=0)),
+                ('on_time_rate', models.FloatField(blank=True, null=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='reputation', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-average_rating'],
+            },
+        ),
+        migrations.RunPython(backfill_reputations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('requests', '0008_fulfiller_reputation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['-created_at'], name='request_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['status', '-created_at'], name='request_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['category', '-created_at'], name='request_category_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['requester', '-created_at'], name='request_requester_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='requestoffer',
+            index=models.Index(fields=['fulfiller', 'status'], name='offer_fulfiller_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='requestoffer',
+            index=models.Index(fields=['request', 'status'], name='offer_request_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='requestoffer',
+            index=models.Index(fields=['fulfiller', '-created_at'], name='offer_fulfiller_created_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.functions import Cast
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from decimal import Decimal
@@ -43,15 +45,63 @@ class Request(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Denormalized counters, maintained by RequestOffer (see adjust_offer_counts)
+    offer_count = models.PositiveIntegerField(default=0, editable=False)
+    pending_offer_count = models.PositiveIntegerField(default=0, editable=False)
+    # Flushed from the view buffer (see studenthub/viewcounts.py)
+    view_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    COUNTER_FIELDS = ('offer_count', 'pending_offer_count', 'view_count')
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Deadline sweeper: open requests past their deadline
+            models.Index(fields=['status', 'deadline'], name='request_status_deadline_idx'),
+            # request_list, unfiltered and by status / category / urgency
+            models.Index(fields=['-created_at'], name='request_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='request_status_created_idx'),
+            models.Index(fields=['category', '-created_at'], name='request_category_created_idx'),
+            # my_requests
+            models.Index(fields=['requester', '-created_at'], name='request_requester_created_idx'),
+            # request_list ?sort=most_viewed
+            models.Index(fields=['-view_count', '-id'], name='request_views_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} by {self.requester.username}"
     
+    def save(self, *args, **kwargs):
+        # Counters are only ever changed with F() updates, so never write back
+        # a possibly stale in-memory copy of them when saving an existing row.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        # Keep the row and its stats rollup (updated from signals) in one transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
+    @property
+    def rollup_key(self):
+        """(date, category, status) bucket this request counts towards"""
+        return timezone.localdate(self.created_at), self.category, self.status
+    
+    def adjust_offer_counts(self, offers=0, pending=0):
+        """Atomically shift the offer counters by the given deltas"""
+        if not offers and not pending:
+            return
+        Request.objects.filter(pk=self.pk).update(
+            offer_count=F('offer_count') + offers,
+            pending_offer_count=F('pending_offer_count') + pending,
+        )
+        self.offer_count += offers
+        self.pending_offer_count += pending
+    
     @property
     def total_offers(self):
-        return self.offers.count()
+        return self.offer_count
     
     @property
     def can_be_fulfilled(self):
@@ -94,31 +144,87 @@ class RequestOffer(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ['request', 'fulfiller']
+        indexes = [
+            models.Index(fields=['fulfiller', 'status'], name='offer_fulfiller_status_idx'),
+            models.Index(fields=['request', 'status'], name='offer_request_status_idx'),
+            # my_offers
+            models.Index(fields=['fulfiller', '-created_at'], name='offer_fulfiller_created_idx'),
+        ]
     
     def __str__(self):
         return f"Offer by {self.fulfiller.username} for {self.request.title}"
     
+    def save(self, *args, **kwargs):
+        """Save the offer and keep the request's offer counters in step"""
+        with transaction.atomic():
+            previous_status = None
+            if not self._state.adding:
+                previous_status = RequestOffer.objects.select_for_update().filter(
+                    pk=self.pk
+                ).values_list('status', flat=True).first()
+            super().save(*args, **kwargs)
+            
+            self.request.adjust_offer_counts(
+                offers=1 if previous_status is None else 0,
+                pending=(self.status == 'pending') - (previous_status == 'pending'),
+            )
+    
     def accept(self):
-        """Accept this offer and update request status"""
-        self.status = 'accepted'
-        self.save()
+        """
+        Accept this offer, reject the other pending offers and open a fulfillment.
         
-        # Reject all other offers for this request
-        RequestOffer.objects.filter(
-            request=self.request,
-            status='pending'
-        ).exclude(pk=self.pk).update(status='rejected')
+        Runs as one transaction with a fixed number of queries. The request
+        and the offer are claimed with conditional UPDATEs, so when two
+        accepts race only one of them succeeds. Returns the new
+        RequestFulfillment, or None if the request was no longer open or
+        the offer no longer pending.
+        """
+        from .facets import invalidate_facets
         
-        # Update request status
-        self.request.status = 'in_progress'
-        self.request.save()
+        request_obj = self.request
+        now = timezone.now()
+        with transaction.atomic():
+            # Claim the request; after this no offer on it is pending any more
+            claimed = Request.objects.filter(pk=request_obj.pk, status='open').update(
+                status='in_progress', pending_offer_count=0, updated_at=now
+            )
+            if not claimed:
+                return None
+            
+            accepted = RequestOffer.objects.filter(pk=self.pk, status='pending').update(
+                status='accepted', updated_at=now
+            )
+            if not accepted:
+                transaction.set_rollback(True)
+                return None
+            
+            # Reject all other offers for this request
+            RequestOffer.objects.filter(
+                request=request_obj,
+                status='pending'
+            ).update(status='rejected', updated_at=now)
+            
+            fulfillment = RequestFulfillment.objects.create(
+                request=request_obj,
+                offer=self,
+                fulfiller_id=self.fulfiller_id
+            )
+            
+            # The conditional UPDATE bypassed Request.save, so move the
+            # request between rollup buckets here. The claim proved the row
+            # was open, whatever the in-memory copy says.
+            request_obj.status = 'open'
+            previous_key = request_obj.rollup_key
+            request_obj.status = 'in_progress'
+            RequestDailyStat.record(previous_key, -1, -request_obj.fee)
+            RequestDailyStat.record(request_obj.rollup_key, 1, request_obj.fee)
+            transaction.on_commit(invalidate_facets)
         
-        # Create fulfillment record
-        RequestFulfillment.objects.create(
-            request=self.request,
-            offer=self,
-            fulfiller=self.fulfiller
-        )
+        request_obj.pending_offer_count = 0
+        request_obj.updated_at = now
+        self.status = 'accepted'
+        self.updated_at = now
+        return fulfillment
     
     def reject(self):
         """Reject this offer"""
@@ -148,9 +254,144 @@ class RequestFulfillment(models.Model):
     
     def mark_completed(self):
         """Mark this fulfillment as completed"""
-        self.completion_date = timezone.now()
-        self.save()
+        with transaction.atomic():
+            first_completion = self.completion_date is None
+            self.completion_date = timezone.now()
+            self.save()
+            
+            # Update request status
+            self.request.status = 'completed'
+            self.request.save()
+            
+            if first_completion:
+                FulfillerReputation.record_completion(self)
+
+
+class RequestDailyStat(models.Model):
+    """Pre-aggregated request counts and fees per creation day, category and status"""
+    date = models.DateField()
+    category = models.CharField(max_length=20, choices=Request.CATEGORY_CHOICES)
+    status = models.CharField(max_length=20, choices=Request.STATUS_CHOICES)
+    request_count = models.IntegerField(default=0)
+    fee_total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    
+    class Meta:
+        ordering = ['-date', 'category', 'status']
+        unique_together = ['date', 'category', 'status']
+    
+    def __str__(self):
+        return f"{self.date} {self.category}/{self.status}: {self.request_count}"
+    
+    @classmethod
+    def record(cls, key, count, fee):
+        """Shift the rollup row for a (date, category, status) key by the given deltas"""
+        date, category, status = key
+        rows = cls.objects.filter(date=date, category=category, status=status)
+        deltas = {
+            'request_count': F('request_count') + count,
+            'fee_total': F('fee_total') + fee,
+        }
+        if rows.update(**deltas):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    date=date, category=category, status=status,
+                    request_count=count, fee_total=fee,
+                )
+        except IntegrityError:
+            # Another writer created the row first
+            rows.update(**deltas)
+
+
+class RecommendationProfile(models.Model):
+    """A fulfiller's preferences, distilled from their offers and fulfillments"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='recommendation_profile')
+    category_weights = models.JSONField(default=dict)
+    locations = models.JSONField(default=list)
+    fee_median = models.FloatField(default=0)
+    fee_spread = models.FloatField(default=1)
+    scored_until = models.DateTimeField(help_text="Open requests created before this have been scored")
+    
+    def __str__(self):
+        return f"Recommendation profile for {self.user.username}"
+
+
+class RequestRecommendation(models.Model):
+    """One of a user's top-N recommended open requests"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='request_recommendations')
+    request = models.ForeignKey(Request, on_delete=models.CASCADE, related_name='recommendations')
+    score = models.FloatField()
+    
+    class Meta:
+        ordering = ['-score']
+        unique_together = ['user', 'request']
+        indexes = [
+            models.Index(fields=['user', '-score'], name='recommendation_user_score_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.request.title} for {self.user.username} ({self.score:.2f})"
+
+
+class FulfillerReputation(models.Model):
+    """Running totals of a fulfiller's completed work, updated on each completion"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='reputation')
+    completed_count = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_total = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(null=True, blank=True)
+    # Completions whose offer had an estimated delivery, and how many met it
+    timed_count = models.PositiveIntegerField(default=0)
+    on_time_count = models.PositiveIntegerField(default=0)
+    on_time_rate = models.FloatField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-average_rating']
+    
+    def __str__(self):
+        return f"Reputation of {self.user.username}"
+    
+    @classmethod
+    def record_completion(cls, fulfillment):
+        """Fold one completed fulfillment into its fulfiller's totals"""
+        rated = 1 if fulfillment.rating else 0
+        rating = fulfillment.rating or 0
+        estimated = fulfillment.offer.estimated_delivery
+        timed = 1 if estimated else 0
+        on_time = 1 if estimated and fulfillment.completion_date <= estimated else 0
         
-        # Update request status
-        self.request.status = 'completed'
-        self.request.save()
+        rows = cls.objects.filter(user_id=fulfillment.fulfiller_id)
+        # Every right-hand side reads the pre-update values
+        deltas = {
+            'completed_count': F('completed_count') + 1,
+            'rating_count': F('rating_count') + rated,
+            'rating_total': F('rating_total') + rating,
+            'timed_count': F('timed_count') + timed,
+            'on_time_count': F('on_time_count') + on_time,
+        }
+        if rated:
+            deltas['average_rating'] = (
+                Cast(F('rating_total') + rating, models.FloatField()) / (F('rating_count') + 1)
+            )
+        if timed:
+            deltas['on_time_rate'] = (
+                Cast(F('on_time_count') + on_time, models.FloatField()) / (F('timed_count') + 1)
+            )
+        if rows.update(**deltas):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    user_id=fulfillment.fulfiller_id,
+                    completed_count=1,
+                    rating_count=rated,
+                    rating_total=rating,
+                    average_rating=float(rating) if rated else None,
+                    timed_count=timed,
+                    on_time_count=on_time,
+                    on_time_rate=float(on_time) if timed else None,
+                )
+        except IntegrityError:
+            # Another completion created the row first
+            rows.update(**deltas)
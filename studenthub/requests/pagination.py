@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from studenthub.pagination import CursorPaginator
+
+
+def paginate(request, queryset, per_page, count=None, keyset=True):
+    """
+    Return the requested page as a Page (?page=N) or, when cursor
+    pagination is enabled or a ?cursor= token is given, as a CursorPage.
+
+    A known total can be passed in as count to spare the paginator its
+    own COUNT query. keyset=False always pages by number, for orders the
+    (created_at, pk) cursor cannot follow.
+    """
+    if keyset and ('cursor' in request.GET or getattr(settings, 'REQUESTS_CURSOR_PAGINATION', False)):
+        paginator = CursorPaginator(queryset, per_page)
+        if count is not None:
+            paginator.count = count
+        return paginator.get_page(request.GET.get('cursor'))
+
+    paginator = Paginator(queryset, per_page)
+    if count is not None:
+        paginator.count = count
+    return paginator.get_page(request.GET.get('page'))
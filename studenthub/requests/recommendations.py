@@ -0,0 +1,254 @@
+"""
+"Recommended for you" feed: open requests ranked for a fulfiller from their
+own offer and fulfillment history, precomputed in batches with NumPy.
+"""
+from collections import defaultdict
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+from .models import (
+    RecommendationProfile, Request, RequestFulfillment, RequestOffer, RequestRecommendation,
+)
+
+
+TOP_N = 20
+
+# Users scored per NumPy block, bounding the score matrix size
+BLOCK_SIZE = 256
+
+CATEGORY_WEIGHT = 0.5
+FEE_WEIGHT = 0.3
+LOCATION_WEIGHT = 0.2
+URGENT_BONUS = 0.05
+
+CATEGORIES = [value for value, _ in Request.CATEGORY_CHOICES]
+CATEGORY_INDEX = {value: index for index, value in enumerate(CATEGORIES)}
+
+
+def normalize_location(location):
+    return ' '.join((location or '').lower().split())
+
+
+class OpenRequestSnapshot:
+    """Columnar in-memory copy of the open requests being scored"""
+
+    def __init__(self, rows):
+        self.ids = np.array([row['pk'] for row in rows], dtype=np.int64)
+        self.requesters = np.array([row['requester_id'] for row in rows], dtype=np.int64)
+        self.categories = np.array(
+            [CATEGORY_INDEX.get(row['category'], CATEGORY_INDEX['other']) for row in rows],
+            dtype=np.intp,
+        )
+        self.fees = np.array([float(row['fee']) for row in rows], dtype=float)
+        self.urgent = np.array([row['is_urgent'] for row in rows], dtype=bool)
+
+        # Locations become small integer codes; code len(...) means "no location"
+        self.location_index = {}
+        for row in rows:
+            location = normalize_location(row['location'])
+            if location:
+                self.location_index.setdefault(location, len(self.location_index))
+        missing = len(self.location_index)
+        self.location_codes = np.array(
+            [self.location_index.get(normalize_location(row['location']), missing) for row in rows],
+            dtype=np.intp,
+        )
+        self.column = {pk: index for index, pk in enumerate(self.ids.tolist())}
+
+    @classmethod
+    def load(cls, **filters):
+        rows = Request.objects.filter(status='open', **filters).order_by().values(
+            'pk', 'requester_id', 'category', 'fee', 'is_urgent', 'location'
+        )
+        return cls(list(rows))
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def build_profiles():
+    """Distil every user's offers and fulfillments into preference profiles"""
+    weights = defaultdict(lambda: defaultdict(float))
+    fees = defaultdict(list)
+    locations = defaultdict(set)
+
+    offers = RequestOffer.objects.order_by().values_list(
+        'fulfiller_id', 'request__category', 'request__location', 'proposed_fee'
+    )
+    for user_id, category, location, fee in offers:
+        weights[user_id][category] += 1
+        fees[user_id].append(float(fee))
+        location = normalize_location(location)
+        if location:
+            locations[user_id].add(location)
+
+    # Completed work counts double, nudged up or down by its rating
+    fulfillments = RequestFulfillment.objects.order_by().values_list(
+        'fulfiller_id', 'request__category', 'rating'
+    )
+    for user_id, category, rating in fulfillments:
+        weights[user_id][category] += 2 + (0.5 * (rating - 3) if rating else 0)
+
+    profiles = {}
+    for user_id, category_weights in weights.items():
+        top = max(category_weights.values()) or 1
+        user_fees = np.array(fees[user_id] or [0.0])
+        median = float(np.median(user_fees))
+        profiles[user_id] = {
+            'category_weights': {
+                category: round(weight / top, 4) for category, weight in category_weights.items()
+            },
+            'locations': sorted(locations[user_id]),
+            'fee_median': median,
+            'fee_spread': max(float(np.std(user_fees)), 0.25 * median, 1.0),
+        }
+    return profiles
+
+
+def score_matrix(user_ids, profiles, snapshot):
+    """Score every (user, request) pair in one pass; excluded pairs get -inf"""
+    category_weights = np.array([
+        [profile['category_weights'].get(category, 0.0) for category in CATEGORIES]
+        for profile in profiles
+    ])
+    median = np.array([profile['fee_median'] for profile in profiles])[:, None]
+    spread = np.array([profile['fee_spread'] for profile in profiles])[:, None]
+
+    known_locations = np.zeros((len(profiles), len(snapshot.location_index) + 1), dtype=bool)
+    for row, profile in enumerate(profiles):
+        for location in profile['locations']:
+            code = snapshot.location_index.get(location)
+            if code is not None:
+                known_locations[row, code] = True
+
+    fee_fit = np.exp(-0.5 * ((snapshot.fees[None, :] - median) / spread) ** 2)
+    fee_fit = np.where(median > 0, fee_fit, 0.5)
+    scores = (
+        CATEGORY_WEIGHT * category_weights[:, snapshot.categories]
+        + FEE_WEIGHT * fee_fit
+        + LOCATION_WEIGHT * known_locations[:, snapshot.location_codes]
+        + URGENT_BONUS * snapshot.urgent[None, :]
+    )
+
+    # Never recommend a user's own requests
+    scores[np.asarray(user_ids)[:, None] == snapshot.requesters[None, :]] = -np.inf
+    return scores
+
+
+def _exclude_offered(scores, user_rows, snapshot):
+    """Blank out requests the user has already made an offer on"""
+    offered = RequestOffer.objects.filter(
+        request__status='open', fulfiller_id__in=list(user_rows)
+    ).values_list('fulfiller_id', 'request_id')
+    for user_id, request_id in offered.iterator():
+        column = snapshot.column.get(request_id)
+        if column is not None:
+            scores[user_rows[user_id], column] = -np.inf
+
+
+def _top(scores_row, snapshot, top_n):
+    """(request_id, score) pairs for the best top_n positive scores in a row"""
+    candidates = np.flatnonzero(np.isfinite(scores_row) & (scores_row > 0))
+    if len(candidates) > top_n:
+        best = np.argpartition(-scores_row[candidates], top_n - 1)[:top_n]
+        candidates = candidates[best]
+    return [(int(snapshot.ids[i]), float(scores_row[i])) for i in candidates]
+
+
+def _score_in_blocks(user_ids, profiles, snapshot):
+    """Yield (user_ids, score matrix) blocks with offered pairs excluded"""
+    for start in range(0, len(user_ids), BLOCK_SIZE):
+        block_ids = user_ids[start:start + BLOCK_SIZE]
+        block_profiles = profiles[start:start + BLOCK_SIZE]
+        scores = score_matrix(block_ids, block_profiles, snapshot)
+        _exclude_offered(scores, {user_id: row for row, user_id in enumerate(block_ids)}, snapshot)
+        yield block_ids, scores
+
+
+def rebuild_recommendations(top_n=TOP_N):
+    """Recompute every profile and recommendation list; returns (users, rows)"""
+    now = timezone.now()
+    snapshot = OpenRequestSnapshot.load(created_at__lt=now)
+    profiles = build_profiles()
+    user_ids = sorted(profiles)
+    ordered_profiles = [profiles[user_id] for user_id in user_ids]
+
+    recommendations = []
+    if len(snapshot):
+        for block_ids, scores in _score_in_blocks(user_ids, ordered_profiles, snapshot):
+            for row, user_id in enumerate(block_ids):
+                recommendations.extend(
+                    RequestRecommendation(user_id=user_id, request_id=request_id, score=score)
+                    for request_id, score in _top(scores[row], snapshot, top_n)
+                )
+
+    with transaction.atomic():
+        RequestRecommendation.objects.all().delete()
+        RecommendationProfile.objects.all().delete()
+        RecommendationProfile.objects.bulk_create([
+            RecommendationProfile(user_id=user_id, scored_until=now, **profiles[user_id])
+            for user_id in user_ids
+        ])
+        RequestRecommendation.objects.bulk_create(recommendations, batch_size=1000)
+    return len(user_ids), len(recommendations)
+
+
+def refresh_recommendations(top_n=TOP_N):
+    """
+    Fold requests opened since the last run into the stored top-N lists and
+    drop recommendations for requests that are no longer open. Returns
+    (removed, added).
+    """
+    now = timezone.now()
+    removed, _ = RequestRecommendation.objects.exclude(request__status='open').delete()
+
+    stored = list(RecommendationProfile.objects.order_by('user_id'))
+    if not stored:
+        return removed, 0
+    since = min(profile.scored_until for profile in stored)
+    snapshot = OpenRequestSnapshot.load(created_at__gte=since, created_at__lt=now)
+
+    added = 0
+    if len(snapshot):
+        user_ids = [profile.user_id for profile in stored]
+        profiles = [{
+            'category_weights': profile.category_weights,
+            'locations': profile.locations,
+            'fee_median': profile.fee_median,
+            'fee_spread': profile.fee_spread,
+        } for profile in stored]
+
+        current = defaultdict(dict)
+        for user_id, request_id, score in RequestRecommendation.objects.values_list(
+            'user_id', 'request_id', 'score'
+        ).iterator():
+            current[user_id][request_id] = score
+
+        to_create, to_delete = [], []
+        for block_ids, scores in _score_in_blocks(user_ids, profiles, snapshot):
+            for row, user_id in enumerate(block_ids):
+                fresh = dict(_top(scores[row], snapshot, top_n))
+                if not fresh:
+                    continue
+                existing = current[user_id]
+                merged = {**existing, **fresh}
+                keep = set(sorted(merged, key=merged.get, reverse=True)[:top_n])
+                dropped = [request_id for request_id in existing if request_id not in keep]
+                if dropped:
+                    to_delete.append((user_id, dropped))
+                to_create.extend(
+                    RequestRecommendation(user_id=user_id, request_id=request_id, score=score)
+                    for request_id, score in fresh.items()
+                    if request_id in keep and request_id not in existing
+                )
+
+        with transaction.atomic():
+            for user_id, request_ids in to_delete:
+                RequestRecommendation.objects.filter(user_id=user_id, request_id__in=request_ids).delete()
+            RequestRecommendation.objects.bulk_create(
+                to_create, batch_size=1000, ignore_conflicts=True
+            )
+        added = len(to_create)
+
+    RecommendationProfile.objects.update(scored_until=now)
+    return removed, added
@@ -0,0 +1,67 @@
+from django.db import transaction
+from django.db.models import Avg, Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+from .models import FulfillerReputation, RequestFulfillment
+
+
+SORT_OPTIONS = {
+    'rating': (
+        F('fulfiller_rating').desc(nulls_last=True),
+        F('fulfiller_on_time_rate').desc(nulls_last=True),
+        'proposed_fee',
+    ),
+    'fee': ('proposed_fee', '-created_at'),
+}
+
+
+def reputation_totals():
+    """Per-fulfiller totals aggregated straight from the completed fulfillments"""
+    return (
+        RequestFulfillment.objects.filter(completion_date__isnull=False)
+        .order_by()
+        .values('fulfiller')
+        .annotate(
+            completed_count=Count('pk'),
+            rating_count=Count('rating'),
+            rating_total=Coalesce(Sum('rating'), 0),
+            average_rating=Avg('rating'),
+            timed_count=Count('pk', filter=Q(offer__estimated_delivery__isnull=False)),
+            on_time_count=Count('pk', filter=Q(completion_date__lte=F('offer__estimated_delivery'))),
+        )
+    )
+
+
+def rebuild_reputations():
+    """Recompute every reputation record from scratch; returns the row count"""
+    reputations = []
+    for row in reputation_totals():
+        timed = row['timed_count']
+        reputations.append(FulfillerReputation(
+            user_id=row['fulfiller'],
+            completed_count=row['completed_count'],
+            rating_count=row['rating_count'],
+            rating_total=row['rating_total'],
+            average_rating=row['average_rating'],
+            timed_count=timed,
+            on_time_count=row['on_time_count'],
+            on_time_rate=row['on_time_count'] / timed if timed else None,
+        ))
+    with transaction.atomic():
+        FulfillerReputation.objects.all().delete()
+        FulfillerReputation.objects.bulk_create(reputations)
+    return len(reputations)
+
+
+def with_reputation(offers, sort=None):
+    """
+    Annotate an offer queryset with its fulfiller's reputation (one LEFT
+    JOIN) and optionally order it by one of SORT_OPTIONS.
+    """
+    offers = offers.annotate(
+        fulfiller_rating=F('fulfiller__reputation__average_rating'),
+        fulfiller_completed=F('fulfiller__reputation__completed_count'),
+        fulfiller_on_time_rate=F('fulfiller__reputation__on_time_rate'),
+    )
+    if sort in SORT_OPTIONS:
+        offers = offers.order_by(*SORT_OPTIONS[sort])
+    return offers
@@ -0,0 +1,24 @@
+from django.db.models import Q
+from studenthub.fts import FullTextIndex, tokenize
+
+
+# bm25 column weights for (title, description, location)
+SEARCH_INDEX = FullTextIndex(
+    'requests_request_fts', 'requests_request', ('title', 'description', 'location'), (10.0, 1.0, 2.0)
+)
+
+
+def search_requests(queryset, terms):
+    """
+    Filter a Request queryset by free-text search.
+
+    Uses the FTS5 index ranked by bm25 when it is available, otherwise the
+    plain icontains filter over title, description and location.
+    """
+    if not tokenize(terms) or not SEARCH_INDEX.available(queryset.db):
+        return queryset.filter(
+            Q(title__icontains=terms) |
+            Q(description__icontains=terms) |
+            Q(location__icontains=terms)
+        )
+    return SEARCH_INDEX.search(queryset, terms)
@@ -0,0 +1,68 @@
+from decimal import Decimal
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .facets import invalidate_facets
+from .models import Request, RequestDailyStat, RequestOffer
+from .search import SEARCH_INDEX
+
+
+@receiver(post_delete, sender=RequestOffer)
+def decrement_offer_counts(sender, instance, **kwargs):
+    """Keep the request's offer counters in step when an offer is deleted."""
+    Request.objects.filter(pk=instance.request_id).update(
+        offer_count=F('offer_count') - 1,
+        pending_offer_count=F('pending_offer_count') - (1 if instance.status == 'pending' else 0),
+    )
+
+
+@receiver(post_save, sender=Request)
+@receiver(post_delete, sender=Request)
+def expire_request_facets(sender, **kwargs):
+    """Cached facet counts are stale as soon as any request changes."""
+    invalidate_facets()
+
+
+@receiver(post_save, sender=Request)
+def update_search_index(sender, instance, update_fields=None, using='default', **kwargs):
+    """Re-index a request when its searchable text may have changed."""
+    if SEARCH_INDEX.covers(update_fields):
+        SEARCH_INDEX.add(instance, using)
+
+
+@receiver(post_delete, sender=Request)
+def remove_from_search_index(sender, instance, using='default', **kwargs):
+    """Drop a deleted request from the full-text index."""
+    SEARCH_INDEX.remove(instance.pk, using)
+
+
+@receiver(pre_save, sender=Request)
+def remember_rollup_bucket(sender, instance, **kwargs):
+    """Note which stats bucket the stored row counted towards before this save."""
+    instance._previous_rollup = None
+    if instance.pk and not instance._state.adding:
+        previous = Request.objects.filter(pk=instance.pk).only(
+            'created_at', 'category', 'status', 'fee'
+        ).first()
+        if previous is not None:
+            instance._previous_rollup = (previous.rollup_key, previous.fee)
+
+
+@receiver(post_save, sender=Request)
+def update_daily_stats(sender, instance, created, **kwargs):
+    """Move the request between daily rollup buckets when it is created or changes."""
+    previous = getattr(instance, '_previous_rollup', None)
+    current = (instance.rollup_key, Decimal(instance.fee))
+    if previous == current:
+        return
+    if previous is not None:
+        key, fee = previous
+        RequestDailyStat.record(key, -1, -fee)
+    key, fee = current
+    RequestDailyStat.record(key, 1, fee)
+
+
+@receiver(post_delete, sender=Request)
+def remove_from_daily_stats(sender, instance, **kwargs):
+    """Take a deleted request out of its daily rollup bucket."""
+    RequestDailyStat.record(instance.rollup_key, -1, -Decimal(instance.fee))
@@ -0,0 +1,46 @@
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from .models import Request, RequestDailyStat
+
+
+def rebuild_daily_stats():
+    """Recompute every rollup row from the requests table; returns the row count"""
+    rows = (
+        Request.objects.order_by()
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'category', 'status')
+        .annotate(request_count=Count('pk'), fee_total=Sum('fee'))
+    )
+    with transaction.atomic():
+        RequestDailyStat.objects.all().delete()
+        RequestDailyStat.objects.bulk_create([
+            RequestDailyStat(
+                date=row['day'],
+                category=row['category'],
+                status=row['status'],
+                request_count=row['request_count'],
+                fee_total=row['fee_total'],
+            )
+            for row in rows
+        ])
+    return RequestDailyStat.objects.count()
+
+
+def marketplace_totals():
+    """Headline numbers and per-category counts, read from the daily rollup"""
+    stats = RequestDailyStat.objects.order_by()
+    totals = stats.aggregate(
+        total_requests=Sum('request_count'),
+        open_requests=Sum('request_count', filter=Q(status='open')),
+        completed_requests=Sum('request_count', filter=Q(status='completed')),
+        total_fees=Sum('fee_total'),
+    )
+    totals = {key: value or 0 for key, value in totals.items()}
+    totals['category_stats'] = (
+        stats.values('category')
+        .annotate(count=Sum('request_count'))
+        .filter(count__gt=0)
+        .order_by('-count')
+    )
+    return totals
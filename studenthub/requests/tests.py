@@ -1,3 +1,473 @@
-from django.test import TestCase
+from io import StringIO
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from .facets import get_facets
+from .forms import RequestFilterForm
+from .models import (
+    FulfillerReputation, Request, RequestDailyStat, RequestFulfillment, RequestOffer, RequestRecommendation,
+)
+from .pagination import CursorPaginator
+from .recommendations import rebuild_recommendations, refresh_recommendations
+from .reputation import with_reputation
+from .search import SEARCH_INDEX, search_requests
+from .expiry import expire_batch, expire_overdue_requests
+from .stats import marketplace_totals
 
-# Create your tests here.
+
+class OfferFixtures:
+    def setUp(self):
+        self.requester = User.objects.create_user('requester', password='pass12345')
+        self.fulfillers = [
+            User.objects.create_user(f'fulfiller{i}', password='pass12345') for i in range(3)
+        ]
+        self.request_obj = Request.objects.create(
+            title='Need a calculator',
+            description='Scientific calculator for the exam',
+            category='electronics',
+            fee=Decimal('10.00'),
+            requester=self.requester,
+        )
+
+    def make_offer(self, fulfiller):
+        return RequestOffer.objects.create(
+            request=self.request_obj,
+            fulfiller=fulfiller,
+            proposed_fee=Decimal('8.00'),
+            message='I have a spare one',
+        )
+
+
+class OfferCounterTests(OfferFixtures, TestCase):
+    def assertCounts(self, offers, pending):
+        self.request_obj.refresh_from_db()
+        self.assertEqual(self.request_obj.offer_count, offers)
+        self.assertEqual(self.request_obj.pending_offer_count, pending)
+
+    def test_create_withdraw_and_reject(self):
+        first, second, _ = [self.make_offer(user) for user in self.fulfillers]
+        self.assertCounts(3, 3)
+
+        first.withdraw()
+        self.assertCounts(3, 2)
+
+        second.reject()
+        self.assertCounts(3, 1)
+
+    def test_accept_rejects_siblings(self):
+        offers = [self.make_offer(user) for user in self.fulfillers]
+        offers[0].accept()
+        self.assertCounts(3, 0)
+
+
+    def test_request_save_does_not_overwrite_counters(self):
+        stale = Request.objects.get(pk=self.request_obj.pk)
+        self.make_offer(self.fulfillers[0])
+        stale.title = 'Need a graphing calculator'
+        stale.save()
+        self.assertCounts(1, 1)
+
+    def test_delete_and_rebuild(self):
+        offer = self.make_offer(self.fulfillers[0])
+        self.make_offer(self.fulfillers[1])
+        offer.delete()
+        self.assertCounts(1, 1)
+
+        Request.objects.update(offer_count=7, pending_offer_count=7)
+        call_command('rebuild_offer_counts', stdout=StringIO())
+        self.assertCounts(1, 1)
+
+
+class OfferAcceptTests(OfferFixtures, TestCase):
+    def test_accept_in_fixed_query_budget(self):
+        offers = [self.make_offer(user) for user in self.fulfillers]
+        offer = RequestOffer.objects.select_related('request').get(pk=offers[1].pk)
+        # 6 writes, plus savepoints and creating the first in_progress rollup row;
+        # the count does not grow with the number of sibling offers
+        with self.assertNumQueries(11):
+            fulfillment = offer.accept()
+
+        self.assertEqual(fulfillment.fulfiller, self.fulfillers[1])
+        self.assertEqual(RequestFulfillment.objects.filter(request=self.request_obj).count(), 1)
+        statuses = dict(RequestOffer.objects.values_list('fulfiller__username', 'status'))
+        self.assertEqual(statuses, {
+            'fulfiller0': 'rejected', 'fulfiller1': 'accepted', 'fulfiller2': 'rejected',
+        })
+        self.request_obj.refresh_from_db()
+        self.assertEqual(self.request_obj.status, 'in_progress')
+        self.assertEqual(
+            RequestDailyStat.objects.get(status='in_progress').request_count, 1
+        )
+
+    def test_losing_the_race_changes_nothing(self):
+        first, second = [self.make_offer(user) for user in self.fulfillers[:2]]
+        stale = RequestOffer.objects.select_related('request').get(pk=second.pk)
+
+        self.assertIsNotNone(first.accept())
+        self.assertIsNone(stale.accept())
+        self.assertEqual(RequestFulfillment.objects.count(), 1)
+        self.assertEqual(RequestOffer.objects.get(pk=second.pk).status, 'rejected')
+
+    def test_withdrawn_offer_is_rolled_back(self):
+        offer = self.make_offer(self.fulfillers[0])
+        stale = RequestOffer.objects.select_related('request').get(pk=offer.pk)
+        offer.withdraw()
+
+        self.assertIsNone(stale.accept())
+        self.request_obj.refresh_from_db()
+        self.assertEqual(self.request_obj.status, 'open')
+        self.assertFalse(RequestFulfillment.objects.exists())
+
+    def test_stale_request_status_moves_the_open_bucket(self):
+        offer = self.make_offer(self.fulfillers[0])
+        stale = RequestOffer.objects.select_related('request').get(pk=offer.pk)
+        stale.request.status = 'completed'
+        stale.accept()
+        stats = dict(RequestDailyStat.objects.values_list('status', 'request_count'))
+        self.assertEqual(stats, {'open': 0, 'in_progress': 1})
+
+
+class RequestFacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.requester = User.objects.create_user('requester', password='pass12345')
+        for title, category, fee, urgent in [
+            ('Textbook', 'books', '5.00', True),
+            ('Notes', 'books', '30.00', False),
+            ('Charger', 'electronics', '120.00', True),
+        ]:
+            Request.objects.create(
+                title=title, description='needed', category=category,
+                fee=Decimal(fee), is_urgent=urgent, requester=self.requester,
+            )
+
+    def facets_for(self, data):
+        form = RequestFilterForm(data)
+        form.is_valid()
+        return get_facets(form, form.filter_queryset(Request.objects.all()))
+
+    def test_single_query_and_counts(self):
+        with self.assertNumQueries(1):
+            facets = self.facets_for({'category': 'books'})
+        self.assertEqual((facets['total'], facets['open'], facets['urgent']), (2, 2, 1))
+        counts = {facet['value']: facet['count'] for facet in facets['fee_buckets']}
+        self.assertEqual(counts['under_10'], 1)
+        self.assertEqual(counts['25_50'], 1)
+        self.assertEqual(counts['100_plus'], 0)
+
+    def test_cached_by_signature_and_invalidated_on_write(self):
+        self.facets_for({'search': ' Notes '})
+        with self.assertNumQueries(0):
+            facets = self.facets_for({'search': 'notes'})
+        self.assertEqual(facets['total'], 1)
+
+        Request.objects.create(
+            title='More notes', description='needed', category='books',
+            fee=Decimal('3.00'), requester=self.requester,
+        )
+        self.assertEqual(self.facets_for({'search': 'notes'})['total'], 2)
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        requester = User.objects.create_user('requester', password='pass12345')
+        base = timezone.now()
+        self.requests = []
+        for i in range(7):
+            request_obj = Request.objects.create(
+                title=f'Request {i}', description='needed', category='other',
+                fee=Decimal('1.00'), requester=requester,
+            )
+            # Two requests share a timestamp to exercise the id tie-breaker
+            Request.objects.filter(pk=request_obj.pk).update(
+                created_at=base - timedelta(minutes=min(i, 5))
+            )
+            self.requests.append(request_obj)
+
+    def titles(self, page):
+        return [request_obj.title for request_obj in page]
+
+    def test_walk_forward_and_back(self):
+        paginator = CursorPaginator(Request.objects.all(), 3)
+        with self.assertNumQueries(1):
+            first = paginator.get_page()
+        self.assertEqual(self.titles(first), ['Request 0', 'Request 1', 'Request 2'])
+        self.assertFalse(first.has_previous())
+
+        second = paginator.get_page(first.next_cursor)
+        self.assertEqual(self.titles(second), ['Request 3', 'Request 4', 'Request 6'])
+
+        third = paginator.get_page(second.next_cursor)
+        self.assertEqual(self.titles(third), ['Request 5'])
+        self.assertFalse(third.has_next())
+
+        back = paginator.get_page(third.previous_cursor)
+        self.assertEqual(self.titles(back), self.titles(second))
+        self.assertTrue(back.has_previous())
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        page = CursorPaginator(Request.objects.all(), 3).get_page('not-a-cursor')
+        self.assertEqual(self.titles(page), ['Request 0', 'Request 1', 'Request 2'])
+
+
+class RequestSearchTests(TestCase):
+    def setUp(self):
+        self.requester = User.objects.create_user('requester', password='pass12345')
+
+    def make_request(self, title, description='needed', location=''):
+        return Request.objects.create(
+            title=title, description=description, location=location,
+            category='other', fee=Decimal('1.00'), requester=self.requester,
+        )
+
+    def search(self, terms):
+        return list(search_requests(Request.objects.all(), terms))
+
+    def test_ranked_prefix_search(self):
+        self.assertTrue(SEARCH_INDEX.available())
+        in_body = self.make_request('Need help', description='Calculator batteries')
+        in_title = self.make_request('Calculator wanted')
+        self.make_request('Bike pump')
+        self.assertEqual(self.search('calc'), [in_title, in_body])
+
+    @override_settings(REQUESTS_CURSOR_PAGINATION=True)
+    def test_search_keeps_rank_order_in_cursor_mode(self):
+        self.assertTrue(SEARCH_INDEX.available())
+        in_title = self.make_request('Calculator wanted')
+        in_body = self.make_request('Need help', description='Calculator batteries')
+        url = reverse('requests:request_list')
+        for params in ({'search': 'calc'}, {'search': 'calc', 'cursor': ''}):
+            page_obj = self.client.get(url, params).context['page_obj']
+            self.assertEqual(list(page_obj), [in_title, in_body])
+        self.assertEqual(list(self.client.get(url).context['page_obj'])[:2], [in_body, in_title])
+
+    def test_search_is_lazy_and_filtered_first(self):
+        self.assertTrue(SEARCH_INDEX.available())
+        wanted = self.make_request('Calculator wanted')
+        self.make_request('Calculator spare')
+        Request.objects.filter(pk=wanted.pk).update(category='electronics')
+        with self.assertNumQueries(0):
+            results = search_requests(Request.objects.filter(category='electronics'), 'calculator')
+        self.assertEqual(results.count(), 1)
+        self.assertEqual(list(results), [wanted])
+
+    def test_index_follows_edits_and_deletes(self):
+        request_obj = self.make_request('Bike pump', location='Library')
+        self.assertEqual(self.search('library'), [request_obj])
+
+        request_obj.location = 'Hostel'
+        request_obj.save()
+        self.assertEqual(self.search('library'), [])
+        self.assertEqual(self.search('hostel'), [request_obj])
+
+        request_obj.delete()
+        self.assertEqual(self.search('hostel'), [])
+
+    def test_rebuild_command(self):
+        request_obj = self.make_request('Graph paper')
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM requests_request_fts')
+        self.assertEqual(self.search('graph'), [])
+        call_command('rebuild_request_search_index', stdout=StringIO())
+        self.assertEqual(self.search('graph'), [request_obj])
+
+
+class DailyStatsTests(TestCase):
+    def setUp(self):
+        self.requester = User.objects.create_user('requester', password='pass12345')
+
+    def make_request(self, category, fee, **extra):
+        return Request.objects.create(
+            title='Request', description='needed', category=category,
+            fee=Decimal(fee), requester=self.requester, **extra
+        )
+
+    def test_rollup_follows_changes(self):
+        books = self.make_request('books', '5.00')
+        self.make_request('books', '7.50')
+        food = self.make_request('food', '2.00')
+
+        books.status = 'completed'
+        books.save()
+        food.fee = Decimal('4.00')
+        food.save()
+
+        totals = marketplace_totals()
+        self.assertEqual(totals['total_requests'], 3)
+        self.assertEqual(totals['open_requests'], 2)
+        self.assertEqual(totals['completed_requests'], 1)
+        self.assertEqual(totals['total_fees'], Decimal('16.50'))
+        self.assertEqual(
+            [(row['category'], row['count']) for row in totals['category_stats']],
+            [('books', 2), ('food', 1)],
+        )
+
+        food.delete()
+        self.assertEqual(marketplace_totals()['total_fees'], Decimal('12.50'))
+
+    def test_rebuild_matches_incremental(self):
+        self.make_request('books', '5.00')
+        self.make_request('transport', '3.00', status='cancelled')
+        incremental = sorted(RequestDailyStat.objects.values_list(
+            'date', 'category', 'status', 'request_count', 'fee_total'
+        ))
+        RequestDailyStat.objects.all().delete()
+        call_command('rebuild_request_stats', stdout=StringIO())
+        rebuilt = sorted(RequestDailyStat.objects.values_list(
+            'date', 'category', 'status', 'request_count', 'fee_total'
+        ))
+        self.assertEqual(rebuilt, incremental)
+
+
+class DeadlineExpiryTests(TestCase):
+    def setUp(self):
+        self.requester = User.objects.create_user('requester', password='pass12345')
+        self.fulfiller = User.objects.create_user('fulfiller', password='pass12345')
+
+    def make_request(self, deadline, status='open'):
+        return Request.objects.create(
+            title='Request', description='needed', category='books', fee=Decimal('2.00'),
+            requester=self.requester, deadline=deadline, status=status,
+        )
+
+    def test_sweep_cancels_only_overdue_open_requests(self):
+        past = timezone.now() - timedelta(hours=1)
+        overdue = [self.make_request(past) for _ in range(5)]
+        upcoming = self.make_request(timezone.now() + timedelta(days=1))
+        no_deadline = self.make_request(None)
+        in_progress = self.make_request(past, status='in_progress')
+        offer = RequestOffer.objects.create(
+            request=overdue[0], fulfiller=self.fulfiller,
+            proposed_fee=Decimal('2.00'), message='On it',
+        )
+
+        self.assertEqual(expire_batch(batch_size=2), 2)
+        self.assertEqual(expire_overdue_requests(batch_size=2), 3)
+
+        statuses = dict(Request.objects.values_list('pk', 'status'))
+        self.assertTrue(all(statuses[r.pk] == 'cancelled' for r in overdue))
+        self.assertEqual(statuses[upcoming.pk], 'open')
+        self.assertEqual(statuses[no_deadline.pk], 'open')
+        self.assertEqual(statuses[in_progress.pk], 'in_progress')
+
+        offer.refresh_from_db()
+        self.assertEqual(offer.status, 'withdrawn')
+        overdue[0].refresh_from_db()
+        self.assertEqual((overdue[0].offer_count, overdue[0].pending_offer_count), (1, 0))
+
+        totals = marketplace_totals()
+        self.assertEqual(totals['open_requests'], 2)
+        self.assertEqual(RequestDailyStat.objects.get(status='cancelled').request_count, 5)
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        self.requester = User.objects.create_user('requester', password='pass12345')
+        self.fulfiller = User.objects.create_user('fulfiller', password='pass12345')
+        history = self.make_request('books', '10.00', location='Library')
+        RequestOffer.objects.create(
+            request=history, fulfiller=self.fulfiller, proposed_fee=Decimal('10.00'), message='Sure',
+        ).accept()
+
+    def make_request(self, category, fee, location='', requester=None):
+        return Request.objects.create(
+            title='Request', description='needed', category=category, fee=Decimal(fee),
+            location=location, requester=requester or self.requester,
+        )
+
+    def recommended(self):
+        return list(
+            RequestRecommendation.objects.filter(user=self.fulfiller).values_list('request', flat=True)
+        )
+
+    def test_full_build_ranks_by_history(self):
+        best = self.make_request('books', '11.00', location='library')
+        okay = self.make_request('books', '90.00')
+        weak = self.make_request('food', '10.00')
+        self.make_request('books', '10.00', requester=self.fulfiller)
+
+        rebuild_recommendations()
+        self.assertEqual(self.recommended(), [best.pk, okay.pk, weak.pk])
+
+    def test_incremental_refresh(self):
+        closing = self.make_request('books', '10.00')
+        rebuild_recommendations(top_n=1)
+        self.assertEqual(self.recommended(), [closing.pk])
+
+        closing.status = 'cancelled'
+        closing.save()
+        Request.objects.filter(pk=closing.pk).update(created_at=timezone.now() - timedelta(days=1))
+        fresh = self.make_request('books', '12.00')
+
+        self.assertEqual(refresh_recommendations(top_n=1), (1, 1))
+        self.assertEqual(self.recommended(), [fresh.pk])
+
+    def test_request_list_shows_open_recommendations(self):
+        shown = self.make_request('books', '11.00', location='library')
+        closed = self.make_request('books', '12.00')
+        rebuild_recommendations()
+        Request.objects.filter(pk=closed.pk).update(status='cancelled')
+        self.client.login(username='fulfiller', password='pass12345')
+        response = self.client.get(reverse('requests:request_list'))
+        self.assertEqual([r.request for r in response.context['recommended']], [shown])
+        self.assertContains(response, 'Recommended for you')
+
+
+class FulfillerReputationTests(TestCase):
+    def setUp(self):
+        self.requester = User.objects.create_user('requester', password='pass12345')
+        self.veteran = User.objects.create_user('veteran', password='pass12345')
+        self.newcomer = User.objects.create_user('newcomer', password='pass12345')
+
+    def complete(self, fulfiller, rating, on_time):
+        request_obj = Request.objects.create(
+            title='Past job', description='done', category='other',
+            fee=Decimal('5.00'), requester=self.requester,
+        )
+        delivery = timezone.now() + timedelta(days=1 if on_time else -1)
+        offer = RequestOffer.objects.create(
+            request=request_obj, fulfiller=fulfiller, proposed_fee=Decimal('5.00'),
+            message='Done', estimated_delivery=delivery,
+        )
+        fulfillment = offer.accept()
+        fulfillment.rating = rating
+        fulfillment.mark_completed()
+
+    def test_incremental_totals_match_rebuild(self):
+        self.complete(self.veteran, 5, on_time=True)
+        self.complete(self.veteran, 4, on_time=False)
+        self.complete(self.veteran, None, on_time=True)
+
+        reputation = FulfillerReputation.objects.get(user=self.veteran)
+        self.assertEqual(reputation.completed_count, 3)
+        self.assertAlmostEqual(reputation.average_rating, 4.5)
+        self.assertAlmostEqual(reputation.on_time_rate, 2 / 3)
+
+        incremental = FulfillerReputation.objects.values().get(user=self.veteran)
+        call_command('rebuild_reputations', stdout=StringIO())
+        rebuilt = FulfillerReputation.objects.values().get(user=self.veteran)
+        incremental.pop('id'), rebuilt.pop('id')
+        self.assertEqual(rebuilt, incremental)
+
+    def test_offers_sorted_by_reputation(self):
+        self.complete(self.veteran, 5, on_time=True)
+        request_obj = Request.objects.create(
+            title='New job', description='needed', category='other',
+            fee=Decimal('5.00'), requester=self.requester,
+        )
+        for fulfiller, fee in [(self.newcomer, '3.00'), (self.veteran, '4.00')]:
+            RequestOffer.objects.create(
+                request=request_obj, fulfiller=fulfiller, proposed_fee=Decimal(fee), message='Me',
+            )
+
+        with self.assertNumQueries(1):
+            offers = list(with_reputation(request_obj.offers.all(), 'rating'))
+        self.assertEqual([offer.fulfiller_id for offer in offers], [self.veteran.pk, self.newcomer.pk])
+        self.assertEqual(offers[0].fulfiller_rating, 5)
+        self.assertIsNone(offers[1].fulfiller_rating)
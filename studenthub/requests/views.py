@@ -1,56 +1,65 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q, Count
-from django.core.paginator import Paginator
 from django.http import JsonResponse
 from django.utils import timezone
-from .models import Request, RequestOffer, RequestFulfillment
+from .facets import get_facets
+from .models import Request, RequestOffer, RequestFulfillment, RequestRecommendation
 from .forms import RequestForm, RequestOfferForm, RequestFilterForm
+from .pagination import paginate
+from .reputation import with_reputation
+from .stats import marketplace_totals
+from studenthub.viewcounts import record_view
 
 
 def request_list(request):
     """Display all requests with filtering and search"""
-    requests_list = Request.objects.all().select_related('requester').prefetch_related('offers')
+    requests_list = Request.objects.all().select_related('requester')
     
     # Apply filters
     form = RequestFilterForm(request.GET)
+    sort = 'newest'
+    searching = False
     if form.is_valid():
-        category = form.cleaned_data.get('category')
-        status = form.cleaned_data.get('status')
-        min_fee = form.cleaned_data.get('min_fee')
-        max_fee = form.cleaned_data.get('max_fee')
-        is_urgent = form.cleaned_data.get('is_urgent')
-        search = form.cleaned_data.get('search')
-        
-        if category:
-            requests_list = requests_list.filter(category=category)
-        if status:
-            requests_list = requests_list.filter(status=status)
-        if min_fee is not None:
-            requests_list = requests_list.filter(fee__gte=min_fee)
-        if max_fee is not None:
-            requests_list = requests_list.filter(fee__lte=max_fee)
-        if is_urgent:
-            requests_list = requests_list.filter(is_urgent=True)
-        if search:
-            requests_list = requests_list.filter(
-                Q(title__icontains=search) | 
-                Q(description__icontains=search) |
-                Q(location__icontains=search)
-            )
-    
-    # Pagination
-    paginator = Paginator(requests_list, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+        requests_list = form.filter_queryset(requests_list)
+        sort = form.cleaned_data['sort'] or sort
+        searching = bool(form.cleaned_data.get('search'))
+    
+    # Totals and sidebar facets come from one cached aggregate query
+    facets = get_facets(form, requests_list)
+    
+    # Pagination (reuse the facet total instead of a second COUNT)
+    # "newest" keeps the default order, which a search replaces by relevance.
+    # Only that default (created_at, pk) order can be followed by a cursor:
+    # relevance has no such key, and view counts move with every flush, so
+    # searches and most_viewed are paged by number
+    if sort == 'most_viewed':
+        requests_list = requests_list.order_by('-view_count', '-pk')
+    keyset = sort == 'newest' and not searching
+    page_obj = paginate(request, requests_list, 12, count=facets['total'], keyset=keyset)
+    
+    # Active filters, for building page links
+    filter_query = request.GET.copy()
+    filter_query.pop('page', None)
+    filter_query.pop('cursor', None)
+    
+    # Precomputed by "manage.py build_recommendations"; a request can have
+    # closed since the last run
+    recommended = []
+    if request.user.is_authenticated:
+        recommended = RequestRecommendation.objects.filter(
+            user=request.user, request__status='open'
+        ).select_related('request')[:5]
     
     context = {
         'page_obj': page_obj,
         'form': form,
-        'total_requests': requests_list.count(),
-        'open_requests': requests_list.filter(status='open').count(),
-        'urgent_requests': requests_list.filter(is_urgent=True, status='open').count(),
+        'recommended': recommended,
+        'filter_query': filter_query.urlencode(),
+        'facets': facets,
+        'total_requests': facets['total'],
+        'open_requests': facets['open'],
+        'urgent_requests': facets['urgent'],
     }
     
     return render(request, 'requests/request_list.html', context)
@@ -77,7 +86,11 @@ def request_create(request):
 def request_detail(request, pk):
     """Display request details and allow offers"""
     request_obj = get_object_or_404(Request, pk=pk)
-    offers = request_obj.offers.all().select_related('fulfiller')
+    if request.method == 'GET':
+        record_view(request_obj)
+    offers = with_reputation(
+        request_obj.offers.all().select_related('fulfiller'), request.GET.get('sort')
+    )
     
     # Check if user has already made an offer
     user_offer = None
@@ -171,7 +184,9 @@ def offer_manage(request, pk):
         messages.error(request, 'You can only manage offers for your own requests.')
         return redirect('requests:request_detail', pk=pk)
     
-    offers = request_obj.offers.all().select_related('fulfiller')
+    offers = with_reputation(
+        request_obj.offers.all().select_related('fulfiller'), request.GET.get('sort', 'rating')
+    )
     
     context = {
         'request_obj': request_obj,
@@ -184,10 +199,12 @@ def offer_manage(request, pk):
 @login_required
 def offer_accept(request, offer_pk):
     """Accept an offer"""
-    offer = get_object_or_404(RequestOffer, pk=offer_pk)
+    offer = get_object_or_404(
+        RequestOffer.objects.select_related('request', 'fulfiller'), pk=offer_pk
+    )
     
     # Only the requester can accept offers
-    if offer.request.requester != request.user:
+    if offer.request.requester_id != request.user.pk:
         messages.error(request, 'You can only accept offers for your own requests.')
         return redirect('requests:request_detail', pk=offer.request.pk)
     
@@ -196,14 +213,10 @@ def offer_accept(request, offer_pk):
         messages.error(request, 'Can only accept offers for open requests.')
         return redirect('requests:request_detail', pk=offer.request.pk)
     
-    # Accept the offer
-    offer.accept()
-    
-    # Create fulfillment record
-    RequestFulfillment.objects.create(
-        request=offer.request,
-        offer=offer
-    )
+    # Accept the offer (also rejects the others and creates the fulfillment)
+    if offer.accept() is None:
+        messages.error(request, 'This offer could not be accepted; the request or offer changed in the meantime.')
+        return redirect('requests:request_detail', pk=offer.request.pk)
     
     messages.success(request, f'Offer from {offer.fulfiller.username} has been accepted!')
     return redirect('requests:request_detail', pk=offer.request.pk)
@@ -245,9 +258,7 @@ def my_requests(request):
     requests_list = Request.objects.filter(requester=request.user).order_by('-created_at')
     
     # Pagination
-    paginator = Paginator(requests_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, requests_list, 10)
     
     context = {
         'page_obj': page_obj,
@@ -265,9 +276,7 @@ def my_offers(request):
     offers_list = RequestOffer.objects.filter(fulfiller=request.user).select_related('request').order_by('-created_at')
     
     # Pagination
-    paginator = Paginator(offers_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, offers_list, 10)
     
     context = {
         'page_obj': page_obj,
@@ -307,22 +316,7 @@ def fulfillment_complete(request, fulfillment_pk):
 
 def request_stats(request):
     """Display request statistics"""
-    total_requests = Request.objects.count()
-    open_requests = Request.objects.filter(status='open').count()
-    completed_requests = Request.objects.filter(status='completed').count()
-    total_fees = Request.objects.aggregate(total=models.Sum('fee'))['total'] or 0
-    
-    # Category breakdown
-    category_stats = Request.objects.values('category').annotate(
-        count=Count('id')
-    ).order_by('-count')
-    
-    context = {
-        'total_requests': total_requests,
-        'open_requests': open_requests,
-        'completed_requests': completed_requests,
-        'total_fees': total_fees,
-        'category_stats': category_stats,
-    }
+    # Read from the pre-aggregated daily rollup instead of scanning every request
+    context = marketplace_totals()
     
     return render(request, 'requests/request_stats.html', context)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Resource, Tag, Comment
+from .models import Resource, Tag, Comment, FileBlob
 
 
 @admin.register(Tag)
@@ -10,19 +10,12 @@ class TagAdmin(admin.ModelAdmin):
 
 @admin.register(Resource)
 class ResourceAdmin(admin.ModelAdmin):
-    list_display = ('title', 'author', 'created_at', 'upvote_count', 'comment_count')
+    list_display = ('title', 'author', 'created_at', 'upvote_count', 'comment_count', 'view_count')
     list_filter = ('created_at', 'tags')
     search_fields = ('title', 'description', 'author__username')
     date_hierarchy = 'created_at'
     filter_horizontal = ('tags', 'upvotes')
-    
-    def upvote_count(self, obj):
-        return obj.upvote_count
-    upvote_count.short_description = 'Upvotes'
-    
-    def comment_count(self, obj):
-        return obj.comment_count
-    comment_count.short_description = 'Comments'
+    readonly_fields = ('file_name', 'upvote_count', 'comment_count', 'view_count')
 
 
 @admin.register(Comment)
@@ -31,3 +24,10 @@ class CommentAdmin(admin.ModelAdmin):
     list_filter = ('created_at',)
     search_fields = ('text', 'author__username', 'resource__title')
     date_hierarchy = 'created_at'
+
+
+@admin.register(FileBlob)
+class FileBlobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'size', 'ref_count', 'created_at')
+    search_fields = ('name',)
+    readonly_fields = ('name', 'size', 'ref_count', 'created_at')
@@ -0,0 +1,138 @@
+"""
+Serving stored resource files: single byte ranges, strong ETags and
+Last-Modified with 304/412 handling, and optional hand-off to the web
+server through X-Accel-Redirect (nginx) or X-Sendfile (Apache, lighttpd).
+
+RESOURCES_DOWNLOAD_ACCEL picks the hand-off mode: None (default) streams
+from Django, 'x-accel' redirects to RESOURCES_DOWNLOAD_ACCEL_PREFIX + name,
+and 'x-sendfile' passes the absolute path.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe, quote_etag
+from .storage import is_blob
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOCK_SIZE = 64 * 1024
+
+
+def file_etag(name, size, modified):
+    """Strong ETag: the content digest for blobs, else derived from size and mtime"""
+    if is_blob(name):
+        digest = os.path.splitext(os.path.basename(name))[0]
+    else:
+        digest = hashlib.sha256(f'{name}:{size}:{modified.timestamp()}'.encode()).hexdigest()
+    return quote_etag(digest)
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single "bytes=" range, None to serve the
+    whole file, or False when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None  # multiple or malformed ranges: fall back to the full body
+    first, last = match.groups()
+    if first == '':
+        length = int(last)
+        if length == 0 or size == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None  # invalid range spec, which must be ignored
+    if start >= size:
+        return False
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _read_range(handle, start, length):
+    handle.seek(start)
+    remaining = length
+    try:
+        while remaining > 0:
+            chunk = handle.read(min(BLOCK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        handle.close()
+
+
+def _accel_response(storage, name):
+    mode = getattr(settings, 'RESOURCES_DOWNLOAD_ACCEL', None)
+    if mode == 'x-accel':
+        prefix = getattr(settings, 'RESOURCES_DOWNLOAD_ACCEL_PREFIX', '/protected-media/')
+        response = HttpResponse()
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + name
+        return response
+    if mode == 'x-sendfile':
+        response = HttpResponse()
+        response['X-Sendfile'] = storage.path(name)
+        return response
+    return None
+
+
+def serve_file(request, storage, name, filename):
+    """Response for downloading storage file `name` as `filename`"""
+    size = storage.size(name)
+    modified = storage.get_modified_time(name)
+    last_modified = int(modified.timestamp())
+    etag = file_etag(name, size, modified)
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    disposition = content_disposition_header(True, filename)
+
+    response = _accel_response(storage, name)
+    if response is None:
+        # The web server handles ranges itself when the download is handed off
+        byte_range = None
+        requested = request.META.get('HTTP_RANGE')
+        if requested and _if_range_matches(request, etag, last_modified):
+            byte_range = parse_range(requested, size)
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+        elif byte_range is not None:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                _read_range(storage.open(name, 'rb'), start, length),
+                status=206, content_type=content_type,
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(length)
+        else:
+            # FileResponse hands the open file to wsgi.file_wrapper, which
+            # servers such as gunicorn send with os.sendfile()
+            response = FileResponse(storage.open(name, 'rb'), content_type=content_type)
+
+    if response.status_code != 416:
+        response['Content-Type'] = content_type
+        response['Content-Disposition'] = disposition
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -0,0 +1,36 @@
+from django.urls import reverse, reverse_lazy
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.html import escape
+from django.utils.text import Truncator
+from studenthub.feeds import CachedFeed
+from .models import Resource
+
+
+class NewResourcesFeed(CachedFeed):
+    model = Resource
+    title = 'StudentHub Resources'
+    link = reverse_lazy('resources:resource_list')
+    description = 'Study resources newly shared on StudentHub.'
+
+    def get_queryset(self):
+        return super().get_queryset().for_listing()
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return escape(Truncator(item.description).words(50))
+
+    def item_link(self, item):
+        return reverse('resources:resource_detail', args=[item.pk])
+
+    def item_author_name(self, item):
+        return item.author.username
+
+    def item_categories(self, item):
+        return [tag.name for tag in item.tag_list]
+
+
+class NewResourcesAtomFeed(NewResourcesFeed):
+    feed_type = Atom1Feed
+    subtitle = NewResourcesFeed.description
@@ -1,6 +1,7 @@
 from django import forms
 from .models import Resource, Comment
 from .models import Tag
+from .tags import normalize_tag, resolve_tags
 
 
 class ResourceForm(forms.ModelForm):
@@ -20,18 +21,35 @@ class ResourceForm(forms.ModelForm):
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 4}),
         }
     
+    def clean_tag_list(self):
+        """Normalized, de-duplicated tag names in the order they were typed"""
+        names = []
+        for raw in self.cleaned_data.get('tag_list', '').split(','):
+            name = normalize_tag(raw)
+            if not name or name in names:
+                continue
+            if len(name) > Tag._meta.get_field('name').max_length:
+                raise forms.ValidationError(f'Tag "{name}" is too long.')
+            names.append(name)
+        return names
+    
     def save(self, commit=True):
-        resource = super().save(commit=False)
+        resource = super().save(commit=commit)
         if commit:
-            resource.save()
-            # Handle tags
-            tag_list = self.cleaned_data.get('tag_list', '')
-            if tag_list:
-                tags = [tag.strip() for tag in tag_list.split(',') if tag.strip()]
-                for tag_name in tags:
-                    tag, created = Tag.objects.get_or_create(name=tag_name.lower())
-                    resource.tags.add(tag)
+            self._save_tags(resource)
+        else:
+            save_m2m = self.save_m2m
+            
+            def save_m2m_and_tags():
+                save_m2m()
+                self._save_tags(resource)
+            self.save_m2m = save_m2m_and_tags
         return resource
+    
+    def _save_tags(self, resource):
+        names = self.cleaned_data.get('tag_list')
+        if names:
+            resource.tags.add(*resolve_tags(names))
 
 
 class CommentForm(forms.ModelForm):
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from resources.related import TOP_K, rebuild_related
+
+
+class Command(BaseCommand):
+    help = 'Recompute the related-resources lists from tag similarity'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=TOP_K, help='Neighbours kept per resource')
+
+    def handle(self, *args, **options):
+        stored = rebuild_related(options['top'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Stored {stored} related-resource links.')
+        )
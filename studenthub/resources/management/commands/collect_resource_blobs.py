@@ -0,0 +1,73 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from resources.models import FileBlob, Resource
+from resources.storage import resource_storage
+
+
+# Names per "file IN (...)" lookup
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Delete stored resource files that no resource refers to any more'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-minutes', type=int, default=60,
+            help='Leave files younger than this alone, as their upload may still be in flight',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(minutes=options['grace_minutes'])
+        dry_run = options['dry_run']
+
+        # Blobs whose last reference has gone
+        unreferenced = FileBlob.objects.filter(ref_count__lte=0, created_at__lt=cutoff)
+        names = [
+            name for name in unreferenced.values_list('name', flat=True)
+            if not resource_storage.exists(name) or resource_storage.get_modified_time(name) < cutoff
+        ]
+
+        # Files on disk with no FileBlob row: interrupted uploads, or uploads
+        # whose resource was never saved
+        known = set(FileBlob.objects.values_list('name', flat=True))
+        for name in resource_storage.blob_names():
+            if name not in known:
+                modified = resource_storage.get_modified_time(name)
+                if modified < cutoff:
+                    names.append(name)
+
+        # ref_count is adjusted from a post_save signal, outside the resource's
+        # own save, so it can lag behind: never trust it over the resources
+        referenced = set()
+        for start in range(0, len(names), BATCH_SIZE):
+            referenced.update(
+                Resource.objects.filter(file__in=names[start:start + BATCH_SIZE]).values_list('file', flat=True)
+            )
+        names = [name for name in names if name not in referenced]
+
+        deleted = freed = 0
+        for name in names:
+            if dry_run:
+                deleted += 1
+                freed += resource_storage.size(name) if resource_storage.exists(name) else 0
+                continue
+            with transaction.atomic():
+                # Check again under the row lock, in case a new upload took the blob
+                blob = FileBlob.objects.select_for_update().filter(name=name).first()
+                if (blob is not None and blob.ref_count > 0) or Resource.objects.filter(file=name).exists():
+                    continue
+                if blob is not None:
+                    blob.delete()
+                if resource_storage.exists(name):
+                    freed += resource_storage.size(name)
+                    resource_storage.delete(name)
+                deleted += 1
+
+        verb = 'Would delete' if dry_run else 'Deleted'
+        self.stdout.write(
+            self.style.SUCCESS(f'{verb} {deleted} unused files ({freed} bytes).')
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from resources.votes import flush_vote_buffer, pending_votes
+
+
+class Command(BaseCommand):
+    help = 'Write buffered resource upvote toggles to the database'
+
+    def handle(self, *args, **options):
+        if not pending_votes():
+            self.stdout.write('No buffered upvotes to flush.')
+            return
+        toggles, pairs = flush_vote_buffer()
+        if not toggles:
+            self.stdout.write(self.style.WARNING(
+                'Nothing flushed: another flush is running or a toggle is still being written.'
+            ))
+            return
+        self.stdout.write(
+            self.style.SUCCESS(f'Flushed {toggles} toggles as {pairs} upvote changes.')
+        )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from studenthub.viewcounts import flush_view_counts, pending_views
+
+
+class Command(BaseCommand):
+    help = 'Write buffered post, resource and request page views to the database'
+
+    def handle(self, *args, **options):
+        if not pending_views():
+            self.stdout.write('No buffered views to flush.')
+            return
+        views = flush_view_counts()
+        if not views:
+            self.stdout.write(self.style.WARNING(
+                'Nothing flushed: another flush is running or a view is still being logged.'
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(f'Flushed {views} views.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from resources.trending import rebuild_hot_scores
+
+
+class Command(BaseCommand):
+    help = 'Recompute the trending score of every resource'
+
+    def handle(self, *args, **options):
+        changed = rebuild_hot_scores()
+        self.stdout.write(
+            self.style.SUCCESS(f'Updated the trending score of {changed} resources.')
+        )
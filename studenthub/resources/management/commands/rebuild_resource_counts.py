@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from resources.models import Resource
+from resources.trending import rebuild_hot_scores
+
+
+class Command(BaseCommand):
+    help = 'Recalculate the denormalized upvote and comment counters on every resource'
+
+    def handle(self, *args, **options):
+        upvote_count = Resource.counted_upvotes()
+        comment_count = Resource.counted_comments()
+        
+        with transaction.atomic():
+            stale = Resource.objects.exclude(
+                upvote_count=upvote_count,
+                comment_count=comment_count,
+            ).count()
+            Resource.objects.update(
+                upvote_count=upvote_count,
+                comment_count=comment_count,
+            )
+        
+        if stale:
+            rebuild_hot_scores()
+            self.stdout.write(f'Corrected counters on {stale} resources.')
+        self.stdout.write(
+            self.style.SUCCESS('Resource counters are up to date.')
+        )
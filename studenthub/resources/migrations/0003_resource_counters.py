@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:24
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    Resource = apps.get_model('resources', 'Resource')
+    Comment = apps.get_model('resources', 'Comment')
+    votes = Resource.upvotes.through.objects.filter(resource=OuterRef('pk')).order_by().values('resource')
+    comments = Comment.objects.filter(resource=OuterRef('pk')).order_by().values('resource')
+    Resource.objects.update(
+        upvote_count=Coalesce(Subquery(votes.annotate(n=Count('pk')).values('n')), 0),
+        comment_count=Coalesce(Subquery(comments.annotate(n=Count('pk')).values('n')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0002_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resource',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='comments'),
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='upvote_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='upvotes'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
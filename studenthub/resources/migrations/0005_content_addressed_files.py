@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:31
+
+import os
+from django.db import migrations, models
+import resources.storage
+
+
+def populate_file_names(apps, schema_editor):
+    Resource = apps.get_model('resources', 'Resource')
+    for resource in Resource.objects.exclude(file='').exclude(file__isnull=True).only('file'):
+        resource.file_name = os.path.basename(resource.file.name)
+        resource.save(update_fields=['file_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0004_tag_ordering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('ref_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='file_name',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='resource',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=resources.storage.get_resource_storage, upload_to='resources/'),
+        ),
+        migrations.RunPython(populate_file_names, migrations.RunPython.noop),
+    ]
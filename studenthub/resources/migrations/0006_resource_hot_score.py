@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:34
+
+import math
+from datetime import datetime, timezone
+from django.db import migrations, models
+
+
+# Same formula as resources.trending.hot_score at the time of writing
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def populate_hot_scores(apps, schema_editor):
+    Resource = apps.get_model('resources', 'Resource')
+    resources = list(Resource.objects.only('upvote_count', 'comment_count', 'created_at'))
+    for resource in resources:
+        activity = resource.upvote_count + 0.5 * resource.comment_count
+        age = (resource.created_at - EPOCH).total_seconds()
+        resource.hot_score = math.log10(max(activity, 1)) + age / 45000
+    Resource.objects.bulk_update(resources, ['hot_score'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0005_content_addressed_files'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resource',
+            name='hot_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='resource',
+            index=models.Index(fields=['-hot_score', '-created_at'], name='resource_hot_idx'),
+        ),
+        migrations.RunPython(populate_hot_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0006_resource_hot_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedResource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='resources.resource')),
+                ('resource', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='resources.resource')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['resource', '-score'], name='related_resource_score_idx')],
+                'unique_together': {('resource', 'related')},
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0007_related_resources'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resource',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='views'),
+        ),
+        migrations.AddIndex(
+            model_name='resource',
+            index=models.Index(fields=['-view_count', '-created_at'], name='resource_views_idx'),
+        ),
+    ]
@@ -1,34 +1,110 @@
+import os
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from django.utils.functional import cached_property
+from .storage import get_resource_storage
 
 
 class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
     
+    class Meta:
+        ordering = ['name']
+    
     def __str__(self):
         return self.name
 
 
+class ResourceQuerySet(models.QuerySet):
+    def for_listing(self):
+        """Everything a resource card renders, in a constant number of queries"""
+        return self.select_related('author').prefetch_related('tags')
+
+
 class Resource(models.Model):
     title = models.CharField(max_length=200)
     link = models.URLField(blank=True, null=True)
-    file = models.FileField(upload_to='resources/', blank=True, null=True)
+    file = models.FileField(upload_to='resources/', storage=get_resource_storage, blank=True, null=True)
+    file_name = models.CharField(max_length=255, blank=True, editable=False)
     description = models.TextField()
     tags = models.ManyToManyField(Tag, blank=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='resources')
     upvotes = models.ManyToManyField(User, related_name='upvoted_resources', blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    # Denormalized counters, maintained from signals (see resources/signals.py)
+    upvote_count = models.PositiveIntegerField('upvotes', default=0, editable=False)
+    comment_count = models.PositiveIntegerField('comments', default=0, editable=False)
+    # Time-decayed popularity for ?sort=trending (see resources/trending.py)
+    hot_score = models.FloatField(default=0, editable=False)
+    # Flushed from the view buffer (see studenthub/viewcounts.py)
+    view_count = models.PositiveIntegerField('views', default=0, editable=False)
+    
+    DERIVED_FIELDS = ('upvote_count', 'comment_count', 'hot_score', 'view_count')
+    
+    # Number of tags shown on a resource card before "+N more"
+    CARD_TAGS = 3
+    
+    objects = ResourceQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at'], name='resource_created_idx'),
+            models.Index(fields=['-hot_score', '-created_at'], name='resource_hot_idx'),
+            models.Index(fields=['-view_count', '-created_at'], name='resource_views_idx'),
+        ]
+    
     def __str__(self):
         return self.title
     
+    def save(self, *args, **kwargs):
+        if self.file and not self.file._committed:
+            # Remember the uploaded name; the stored one is a content digest
+            self.file_name = os.path.basename(self.file.name)
+        # Counters and the hot score are only changed with single-statement
+        # UPDATEs, so never write back a possibly stale in-memory copy of them.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DERIVED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
+    @cached_property
+    def tag_list(self):
+        """Tags by name; served from the prefetch cache when for_listing() was used"""
+        return list(self.tags.all())
+    
     @property
-    def upvote_count(self):
-        return self.upvotes.count()
+    def tag_count(self):
+        return len(self.tag_list)
     
     @property
-    def comment_count(self):
-        return self.comments.count()
+    def top_tags(self):
+        return self.tag_list[:self.CARD_TAGS]
+    
+    @property
+    def more_tag_count(self):
+        return max(self.tag_count - self.CARD_TAGS, 0)
+    
+    @classmethod
+    def counted_upvotes(cls):
+        """Correlated subquery counting the upvotes of the outer resource"""
+        votes = cls.upvotes.through.objects.filter(resource=OuterRef('pk')).order_by().values('resource')
+        return Coalesce(Subquery(votes.annotate(n=Count('pk')).values('n')), 0)
+    
+    @classmethod
+    def counted_comments(cls):
+        """Correlated subquery counting the comments of the outer resource"""
+        comments = Comment.objects.filter(resource=OuterRef('pk')).order_by().values('resource')
+        return Coalesce(Subquery(comments.annotate(n=Count('pk')).values('n')), 0)
+    
+    @classmethod
+    def recount_upvotes(cls, pks):
+        """Recalculate upvote_count from the join table for the given resources"""
+        cls.objects.filter(pk__in=pks).update(upvote_count=cls.counted_upvotes())
 
 
 class Comment(models.Model):
@@ -42,3 +118,40 @@ class Comment(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['resource', '-created_at'], name='comment_resource_created_idx'),
+        ]
+
+
+class FileBlob(models.Model):
+    """A content-addressed upload and how many resources point at it"""
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return self.name
+    
+    @classmethod
+    def adjust(cls, name, delta, size=0):
+        """Shift the reference count of a stored blob, registering it on first use"""
+        if delta > 0:
+            cls.objects.get_or_create(name=name, defaults={'size': size})
+        cls.objects.filter(name=name).update(ref_count=F('ref_count') + delta)
+
+
+class RelatedResource(models.Model):
+    """One of a resource's top-K tag-similar neighbours (see resources/related.py)"""
+    resource = models.ForeignKey(Resource, on_delete=models.CASCADE, related_name='related_links')
+    related = models.ForeignKey(Resource, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    
+    class Meta:
+        unique_together = ['resource', 'related']
+        indexes = [
+            models.Index(fields=['resource', '-score'], name='related_resource_score_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.resource} ~ {self.related} ({self.score:.2f})'
@@ -0,0 +1,151 @@
+"""
+"Related resources": the top-K neighbours of each resource by Jaccard
+similarity of their tag sets, precomputed and stored as RelatedResource
+rows so the detail page reads them with one indexed query.
+
+rebuild_related() scores every resource against every other from a sparse
+resource x tag incidence matrix held as NumPy index arrays: for each
+resource, the shared-tag counts against all others come from one bincount
+over the posting lists of its tags. refresh_related() redoes a single
+resource after its tags change and patches its neighbours' lists.
+"""
+import numpy as np
+from django.db import transaction
+from django.db.models import Count
+from .models import RelatedResource, Resource
+
+
+TOP_K = 6
+
+
+class TagIncidence:
+    """Resource x tag incidence in CSR (by resource) and CSC (by tag) form"""
+
+    def __init__(self, pairs):
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        self.resource_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+        _, columns = np.unique(pairs[:, 1], return_inverse=True)
+        self.row = {int(pk): index for index, pk in enumerate(self.resource_ids)}
+        n_rows = len(self.resource_ids)
+        n_columns = int(columns.max()) + 1 if len(columns) else 0
+
+        order = np.argsort(rows, kind='stable')
+        self.row_columns = columns[order]
+        self.row_ptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n_rows))])
+
+        order = np.argsort(columns, kind='stable')
+        self.column_rows = rows[order]
+        self.column_ptr = np.concatenate([[0], np.cumsum(np.bincount(columns, minlength=n_columns))])
+
+        self.sizes = np.diff(self.row_ptr)
+
+    @classmethod
+    def load(cls):
+        pairs = Resource.tags.through.objects.order_by().values_list('resource_id', 'tag_id')
+        return cls(list(pairs))
+
+    def __len__(self):
+        return len(self.resource_ids)
+
+    def similarities(self, row):
+        """Jaccard similarity of one row against every row (itself excluded)"""
+        columns = self.row_columns[self.row_ptr[row]:self.row_ptr[row + 1]]
+        postings = [self.column_rows[self.column_ptr[c]:self.column_ptr[c + 1]] for c in columns]
+        shared = np.bincount(np.concatenate(postings), minlength=len(self)).astype(float)
+        union = self.sizes[row] + self.sizes - shared
+        scores = np.divide(shared, union, out=np.zeros_like(shared), where=union > 0)
+        scores[row] = 0
+        return scores
+
+
+def top_neighbours(scores, ids, top_k=TOP_K):
+    """(id, score) pairs for the top_k positive scores, best first"""
+    candidates = np.flatnonzero(scores > 0)
+    if len(candidates) > top_k:
+        candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+    candidates = candidates[np.lexsort((ids[candidates], -scores[candidates]))]
+    return [(int(ids[i]), float(scores[i])) for i in candidates]
+
+
+def rebuild_related(top_k=TOP_K):
+    """Recompute every resource's neighbours; returns the number of rows stored"""
+    incidence = TagIncidence.load()
+    links = []
+    for row, resource_id in enumerate(incidence.resource_ids.tolist()):
+        links.extend(
+            RelatedResource(resource_id=resource_id, related_id=related_id, score=score)
+            for related_id, score in top_neighbours(incidence.similarities(row), incidence.resource_ids, top_k)
+        )
+    with transaction.atomic():
+        RelatedResource.objects.all().delete()
+        RelatedResource.objects.bulk_create(links, batch_size=1000)
+    return len(links)
+
+
+def _neighbour_scores(resource_id):
+    """{other_id: jaccard} for every resource sharing a tag with resource_id"""
+    through = Resource.tags.through
+    tag_ids = through.objects.filter(resource_id=resource_id).values('tag_id')
+    shared = dict(
+        through.objects.filter(tag_id__in=tag_ids).exclude(resource_id=resource_id)
+        .order_by().values('resource_id').annotate(n=Count('pk')).values_list('resource_id', 'n')
+    )
+    if not shared:
+        return {}
+    own_size = through.objects.filter(resource_id=resource_id).count()
+    sizes = dict(
+        through.objects.filter(resource_id__in=list(shared))
+        .order_by().values('resource_id').annotate(n=Count('pk')).values_list('resource_id', 'n')
+    )
+    return {
+        other: count / (own_size + sizes[other] - count)
+        for other, count in shared.items()
+    }
+
+
+def refresh_related(resource_id, top_k=TOP_K):
+    """
+    Recompute one resource's neighbours after its tags changed.
+
+    Its own list is rebuilt exactly. In the other direction, stale links to
+    it are dropped or rescored, and it is offered to the lists of its own
+    top neighbours; rebuild_related() remains the exact batch computation.
+    """
+    scores = _neighbour_scores(resource_id)
+    ids = np.array(list(scores), dtype=np.int64)
+    values = np.array(list(scores.values()), dtype=float)
+    neighbours = top_neighbours(values, ids, top_k) if len(ids) else []
+
+    with transaction.atomic():
+        RelatedResource.objects.filter(resource_id=resource_id).delete()
+        RelatedResource.objects.bulk_create([
+            RelatedResource(resource_id=resource_id, related_id=related_id, score=score)
+            for related_id, score in neighbours
+        ])
+
+        incoming = list(RelatedResource.objects.filter(related_id=resource_id))
+        gone = [link.pk for link in incoming if link.resource_id not in scores]
+        RelatedResource.objects.filter(pk__in=gone).delete()
+        kept = [link for link in incoming if link.resource_id in scores]
+        for link in kept:
+            link.score = scores[link.resource_id]
+        RelatedResource.objects.bulk_update(kept, ['score'])
+
+        linked = {link.resource_id for link in kept}
+        for other_id, score in neighbours:
+            if other_id in linked:
+                continue
+            current = list(
+                RelatedResource.objects.filter(resource_id=other_id).order_by('score', 'pk')
+            )
+            if len(current) >= top_k:
+                if current[0].score >= score:
+                    continue
+                current[0].delete()
+            RelatedResource.objects.create(resource_id=other_id, related_id=resource_id, score=score)
+
+
+def related_resources(resource, limit=TOP_K):
+    """The stored neighbours of a resource, best first"""
+    links = resource.related_links.select_related('related').order_by('-score')[:limit]
+    return [link.related for link in links]
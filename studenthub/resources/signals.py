@@ -0,0 +1,130 @@
+from functools import partial
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from studenthub.feeds import mark_changed
+from .models import Comment, FileBlob, Resource, Tag
+from .related import refresh_related
+from .storage import is_blob
+from .tags import invalidate_tag_index
+from .trending import refresh_hot_scores
+
+
+@receiver(m2m_changed, sender=Resource.upvotes.through)
+def update_upvote_count(sender, instance, action, reverse, pk_set, **kwargs):
+    """Recount upvotes for every resource touched by an add, remove or clear."""
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        if action != 'pre_clear':
+            Resource.recount_upvotes([instance.pk])
+            refresh_hot_scores([instance.pk])
+        return
+    # user.upvoted_resources: clearing needs the affected ids before they go
+    if action == 'pre_clear':
+        instance._cleared_upvotes = list(
+            sender.objects.filter(user=instance).values_list('resource_id', flat=True)
+        )
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_upvotes', [])
+    if pk_set:
+        Resource.recount_upvotes(pk_set)
+        refresh_hot_scores(pk_set)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    """Count a new comment against its resource."""
+    if created:
+        Resource.objects.filter(pk=instance.resource_id).update(comment_count=F('comment_count') + 1)
+        refresh_hot_scores([instance.resource_id])
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """Uncount a deleted comment."""
+    Resource.objects.filter(pk=instance.resource_id).update(comment_count=F('comment_count') - 1)
+    refresh_hot_scores([instance.resource_id])
+
+
+@receiver(post_save, sender=Resource)
+def score_new_resource(sender, instance, created, **kwargs):
+    """Give a new resource its starting hot score."""
+    if created:
+        refresh_hot_scores([instance.pk])
+
+
+@receiver(post_save, sender=Tag)
+def add_to_tag_index(sender, created, **kwargs):
+    """New tags must show up in autocomplete straight away."""
+    if created:
+        invalidate_tag_index()
+
+
+@receiver(post_delete, sender=Tag)
+def remove_from_tag_index(sender, **kwargs):
+    invalidate_tag_index()
+
+
+@receiver(pre_save, sender=Resource)
+def remember_stored_file(sender, instance, **kwargs):
+    """Note which blob the stored row pointed at before this save."""
+    instance._previous_file = None
+    if instance.pk and not instance._state.adding:
+        instance._previous_file = (
+            Resource.objects.filter(pk=instance.pk).values_list('file', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Resource)
+def update_blob_references(sender, instance, **kwargs):
+    """Move a blob reference when a resource gains, changes or drops its file."""
+    previous = getattr(instance, '_previous_file', None) or ''
+    current = instance.file.name or ''
+    if previous == current:
+        return
+    if is_blob(current):
+        FileBlob.adjust(current, 1, size=instance.file.size)
+    if is_blob(previous):
+        FileBlob.adjust(previous, -1)
+
+
+@receiver(post_delete, sender=Resource)
+def release_blob_reference(sender, instance, **kwargs):
+    if is_blob(instance.file.name):
+        FileBlob.adjust(instance.file.name, -1)
+
+
+@receiver(m2m_changed, sender=Resource.tags.through)
+def update_related_resources(sender, instance, action, reverse, pk_set, **kwargs):
+    """Refresh the related-resources lists of resources whose tags changed."""
+    if not reverse:
+        resource_ids = [instance.pk] if action in ('post_add', 'post_remove', 'post_clear') else []
+    elif action == 'pre_clear':
+        # tag.resource_set.clear(): the affected ids are gone afterwards
+        instance._cleared_resources = list(
+            sender.objects.filter(tag=instance).values_list('resource_id', flat=True)
+        )
+        return
+    elif action == 'post_clear':
+        resource_ids = getattr(instance, '_cleared_resources', [])
+    else:
+        resource_ids = list(pk_set or []) if action in ('post_add', 'post_remove') else []
+    for resource_id in resource_ids:
+        transaction.on_commit(partial(refresh_related, resource_id))
+
+
+@receiver(post_save, sender=Resource)
+@receiver(post_delete, sender=Resource)
+def expire_resource_feeds(sender, **kwargs):
+    """Cached feeds and their ETags are stale once any resource changes."""
+    mark_changed(Resource)
+
+
+@receiver(m2m_changed, sender=Resource.tags.through)
+def expire_feeds_on_retag(sender, action, **kwargs):
+    """Feed items list their tags."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        mark_changed(Resource)
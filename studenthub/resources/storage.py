@@ -0,0 +1,86 @@
+"""
+Content-addressed storage for resource uploads.
+
+Uploads are streamed to a temporary file in chunks while being hashed, then
+moved to resources/blobs/<aa>/<sha256><ext>. An identical upload finds its
+blob already there and only the temporary copy is discarded, so each
+distinct file is stored once however many resources share it. Which blobs
+are still in use is tracked by FileBlob.ref_count (see signals.py) and
+unused ones are removed by "manage.py collect_resource_blobs".
+"""
+import hashlib
+import os
+import tempfile
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+BLOB_PREFIX = 'resources/blobs'
+MAX_EXTENSION_LENGTH = 10
+
+
+def blob_name(digest, original_name=''):
+    """Storage name for content with the given SHA-256 hex digest"""
+    extension = os.path.splitext(original_name)[1].lower()
+    if len(extension) > MAX_EXTENSION_LENGTH or not extension[1:].isalnum():
+        extension = ''
+    return f'{BLOB_PREFIX}/{digest[:2]}/{digest}{extension}'
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(BLOB_PREFIX + '/')
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # The final name depends on the content and is chosen in _save
+        return name
+
+    def _save(self, name, content):
+        directory = os.path.join(self.location, BLOB_PREFIX)
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        handle, temporary = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    size += len(chunk)
+                    output.write(chunk)
+
+            name = blob_name(digest.hexdigest(), name)
+            path = self.path(name)
+            if os.path.exists(path):
+                os.remove(temporary)
+                # A fresh mtime keeps the blob out of the next collection
+                os.utime(path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(temporary, self.file_permissions_mode)
+                os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        return name
+
+    def blob_names(self):
+        """Every file under the blob directory, interrupted uploads included"""
+        root = self.path(BLOB_PREFIX)
+        for directory, _, files in os.walk(root):
+            for filename in files:
+                relative = os.path.relpath(os.path.join(directory, filename), self.location)
+                yield relative.replace(os.sep, '/')
+
+
+resource_storage = ContentAddressedStorage()
+
+
+def get_resource_storage():
+    return resource_storage
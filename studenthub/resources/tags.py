@@ -0,0 +1,107 @@
+"""
+In-process prefix index over tag names for autocomplete.
+
+The index is a sorted list of names plus their usage counts, built with a
+single query the first time it is needed. Lookups bisect to the prefix
+range and rank matches by usage. Creating or deleting a tag bumps a
+generation number in the cache, so every process rebuilds on its next
+lookup. Usage counts are also refreshed every REFRESH_INTERVAL seconds.
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from django.core.cache import cache
+from django.db.models import Count
+from .models import Tag
+
+
+GENERATION_KEY = 'resources:tags:generation'
+REFRESH_INTERVAL = 60 * 5
+SUGGESTION_LIMIT = 8
+
+# Sorts after every character a tag name can contain
+_PREFIX_END = '\U0010ffff'
+
+
+class TagIndex:
+    def __init__(self, rows):
+        rows = sorted(rows)
+        self.names = [name for name, _ in rows]
+        self.usage = dict(rows)
+
+    @classmethod
+    def load(cls):
+        rows = Tag.objects.order_by().annotate(usage=Count('resource')).values_list('name', 'usage')
+        return cls(list(rows))
+
+    def __len__(self):
+        return len(self.names)
+
+    def suggest(self, prefix, limit=SUGGESTION_LIMIT):
+        """Up to limit (name, usage) pairs starting with prefix, most used first"""
+        start = bisect_left(self.names, prefix)
+        end = bisect_left(self.names, prefix + _PREFIX_END, start)
+        matches = self.names[start:end]
+        best = heapq.nsmallest(limit, matches, key=lambda name: (-self.usage[name], name))
+        return [(name, self.usage[name]) for name in best]
+
+
+_lock = threading.Lock()
+_state = {'index': None, 'generation': None, 'built_at': 0.0}
+
+
+def _generation():
+    return cache.get_or_set(GENERATION_KEY, 1, None)
+
+
+def invalidate_tag_index():
+    """Make every process rebuild its index on the next lookup"""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+def get_tag_index():
+    generation = _generation()
+    index = _state['index']
+    if (
+        index is None
+        or _state['generation'] != generation
+        or time.monotonic() - _state['built_at'] > REFRESH_INTERVAL
+    ):
+        with _lock:
+            if _state['index'] is index:
+                _state.update(index=TagIndex.load(), generation=generation, built_at=time.monotonic())
+            index = _state['index']
+    return index
+
+
+def normalize_tag(name):
+    """Canonical form of a tag name: trimmed, lower case, single spaces"""
+    return ' '.join(name.lower().split())
+
+
+def suggest_tags(prefix, limit=SUGGESTION_LIMIT):
+    prefix = normalize_tag(prefix)
+    if not prefix:
+        return []
+    return get_tag_index().suggest(prefix, limit)
+
+
+def resolve_tags(names):
+    """
+    Tag objects for already normalized names, creating any that are missing.
+
+    One query finds the existing tags and one bulk insert adds the rest;
+    ignore_conflicts covers a concurrent insert of the same name.
+    """
+    tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing = [name for name in names if name not in tags]
+    if missing:
+        Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+        tags.update((tag.name, tag) for tag in Tag.objects.filter(name__in=missing))
+        # bulk_create sends no post_save, so refresh autocomplete here
+        invalidate_tag_index()
+    return [tags[name] for name in names]
@@ -0,0 +1,622 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.contrib.auth.models import User
+from accounts.models import Profile
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from datetime import timedelta
+from django.utils import timezone
+from . import related, tags, trending, votes
+from .forms import ResourceForm
+from .downloads import parse_range
+from .models import Comment, FileBlob, RelatedResource, Resource, Tag
+from .storage import resource_storage
+
+
+class ResourceCounterTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.voter = User.objects.create_user(username='voter', password='pass12345')
+        self.resource = Resource.objects.create(
+            title='Linear algebra notes', description='Week 1-6', author=self.author
+        )
+
+    def refresh(self):
+        self.resource.refresh_from_db()
+        return self.resource
+
+    def test_toggle_upvote_maintains_count(self):
+        self.client.login(username='voter', password='pass12345')
+        url = reverse('resources:toggle_upvote', args=[self.resource.pk])
+        self.client.get(url)
+        self.assertEqual(self.refresh().upvote_count, 1)
+        self.client.get(url)
+        self.assertEqual(self.refresh().upvote_count, 0)
+
+    def test_reverse_and_clear_keep_count(self):
+        self.voter.upvoted_resources.add(self.resource)
+        self.resource.upvotes.add(self.author)
+        self.assertEqual(self.refresh().upvote_count, 2)
+        self.voter.upvoted_resources.clear()
+        self.assertEqual(self.refresh().upvote_count, 1)
+        self.resource.upvotes.clear()
+        self.assertEqual(self.refresh().upvote_count, 0)
+
+    def test_comments_maintain_count(self):
+        self.client.login(username='voter', password='pass12345')
+        self.client.post(reverse('resources:add_comment', args=[self.resource.pk]), {'text': 'Thanks'})
+        Comment.objects.create(resource=self.resource, author=self.author, text='More soon')
+        self.assertEqual(self.refresh().comment_count, 2)
+        Comment.objects.filter(author=self.author).first().delete()
+        self.assertEqual(self.refresh().comment_count, 1)
+
+    def test_save_does_not_clobber_counters(self):
+        stale = Resource.objects.get(pk=self.resource.pk)
+        self.resource.upvotes.add(self.voter)
+        stale.title = 'Renamed'
+        stale.save()
+        self.assertEqual(self.refresh().upvote_count, 1)
+
+    def test_rebuild_command_repairs_drift(self):
+        self.resource.upvotes.add(self.voter)
+        Resource.objects.update(upvote_count=7, comment_count=3)
+        call_command('rebuild_resource_counts', stdout=StringIO())
+        resource = self.refresh()
+        self.assertEqual((resource.upvote_count, resource.comment_count), (1, 0))
+
+    def test_list_counts_are_not_multiplied(self):
+        tag = Tag.objects.create(name='maths')
+        self.resource.tags.add(tag, Tag.objects.create(name='mathematics'))
+        self.resource.upvotes.add(self.voter, self.author)
+        for text in ('a', 'b', 'c'):
+            Comment.objects.create(resource=self.resource, author=self.voter, text=text)
+        response = self.client.get(reverse('resources:resource_list'), {'q': 'math'})
+        resources = list(response.context['page_obj'])
+        self.assertEqual(len(resources), 1)
+        self.assertEqual((resources[0].upvote_count, resources[0].comment_count), (2, 3))
+
+
+class ResourceListingTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.tags = [Tag.objects.create(name=name) for name in ('exam', 'maths', 'notes', 'week1', 'zeta')]
+
+    def add_resources(self, count):
+        for index in range(count):
+            resource = Resource.objects.create(
+                title=f'Resource {index}', description='Shared notes', author=self.author
+            )
+            resource.tags.set(self.tags[:index % 6])
+
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('resources:resource_list'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        self.add_resources(1)
+        single = self.count_list_queries()
+        self.add_resources(9)
+        self.assertEqual(self.count_list_queries(), single)
+
+    def test_card_tags(self):
+        resource = Resource.objects.create(title='Tagged', description='x', author=self.author)
+        resource.tags.set(self.tags)
+        listed = Resource.objects.for_listing().get(pk=resource.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual([tag.name for tag in listed.top_tags], ['exam', 'maths', 'notes'])
+            self.assertEqual((listed.tag_count, listed.more_tag_count), (5, 2))
+        response = self.client.get(reverse('resources:resource_list'))
+        self.assertContains(response, '+2 more')
+        self.assertNotContains(response, '>week1<')
+
+
+@override_settings(RESOURCES_VOTE_BUFFER=True)
+class VoteBufferTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.voter = User.objects.create_user(username='voter', password='pass12345')
+        self.resource = Resource.objects.create(title='Notes', description='x', author=self.author)
+
+    def stored_votes(self):
+        return list(self.resource.upvotes.values_list('username', flat=True))
+
+    def test_toggles_are_buffered_and_coalesced(self):
+        for _ in range(3):
+            votes.toggle_upvote(self.voter, self.resource)
+        self.assertTrue(votes.has_upvoted(self.voter, self.resource))
+        self.assertEqual(self.stored_votes(), [])
+        self.assertEqual(votes.pending_votes(), 3)
+
+        self.assertEqual(votes.flush_vote_buffer(), (3, 1))
+        self.assertEqual(self.stored_votes(), ['voter'])
+        self.resource.refresh_from_db()
+        self.assertEqual(self.resource.upvote_count, 1)
+        self.assertEqual(votes.pending_votes(), 0)
+        self.assertTrue(votes.has_upvoted(self.voter, self.resource))
+
+    def test_net_zero_toggles_leave_votes_untouched(self):
+        self.resource.upvotes.add(self.voter)
+        votes.toggle_upvote(self.voter, self.resource)
+        votes.toggle_upvote(self.voter, self.resource)
+        votes.toggle_upvote(self.author, self.resource)
+        votes.flush_vote_buffer()
+        self.assertEqual(sorted(self.stored_votes()), ['author', 'voter'])
+        self.resource.refresh_from_db()
+        self.assertEqual(self.resource.upvote_count, 2)
+
+    def test_unwritten_entry_holds_back_one_flush(self):
+        votes.toggle_upvote(self.voter, self.resource)
+        votes.LOG.next_sequence()  # a toggle that has not written its entry yet
+        votes.toggle_upvote(self.author, self.resource)
+
+        self.assertEqual(votes.flush_vote_buffer(), (1, 1))
+        self.assertEqual(self.stored_votes(), ['voter'])
+        # Still missing on the next flush, so it is treated as evicted
+        self.assertEqual(votes.flush_vote_buffer(), (2, 1))
+        self.assertEqual(sorted(self.stored_votes()), ['author', 'voter'])
+
+    def test_toggle_written_after_its_gap_was_skipped(self):
+        late = votes.LOG.next_sequence()  # taken, but the entry is written late
+        votes.flush_vote_buffer()
+        votes.flush_vote_buffer()  # gives up on the gap
+        votes._log(late, self.voter.pk, self.resource.pk, True)
+        self.assertTrue(votes.has_upvoted(self.voter, self.resource))
+        self.assertEqual(votes.pending_votes(), 1)
+        votes.flush_vote_buffer()
+        self.assertEqual(self.stored_votes(), ['voter'])
+
+    def test_late_entry_found_when_the_gap_is_skipped(self):
+        late = votes.LOG.next_sequence()
+        votes.flush_vote_buffer()
+        real_set = cache.set
+
+        def set_then_write_late(key, *args, **kwargs):
+            real_set(key, *args, **kwargs)
+            if key == votes.LOG.flushed_key:
+                # Written between the flushed mark moving and the re-read
+                real_set(votes.LOG.entry_key(late), (self.voter.pk, self.resource.pk, True))
+                real_set(votes._state_key(self.voter.pk, self.resource.pk), (True, late))
+
+        with mock.patch.object(cache, 'set', set_then_write_late):
+            votes.flush_vote_buffer()
+        self.assertEqual(self.stored_votes(), ['voter'])
+        self.assertIsNone(cache.get(votes._state_key(self.voter.pk, self.resource.pk)))
+
+    def test_view_and_flush_command(self):
+        self.client.login(username='voter', password='pass12345')
+        self.client.post(reverse('resources:toggle_upvote', args=[self.resource.pk]))
+        response = self.client.get(reverse('resources:resource_detail', args=[self.resource.pk]))
+        self.assertTrue(response.context['has_upvoted'])
+        call_command('flush_upvotes', stdout=StringIO())
+        self.assertEqual(self.stored_votes(), ['voter'])
+
+
+class TagAutocompleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(username='author', password='pass12345')
+        self.python = Tag.objects.create(name='python')
+        Tag.objects.create(name='pytorch')
+        Tag.objects.create(name='physics')
+        for index in range(2):
+            resource = Resource.objects.create(title=f'R{index}', description='x', author=author)
+            resource.tags.add(self.python)
+
+    def suggest(self, q, **params):
+        response = self.client.get(reverse('resources:tag_autocomplete'), {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(row['name'], row['count']) for row in response.json()['results']]
+
+    def test_prefix_matches_ranked_by_usage(self):
+        self.assertEqual(self.suggest('PY'), [('python', 2), ('pytorch', 0)])
+        self.assertEqual(self.suggest('py', limit=1), [('python', 2)])
+        self.assertEqual(self.suggest('ph'), [('physics', 0)])
+        self.assertEqual(self.suggest('z'), [])
+        self.assertEqual(self.suggest(''), [])
+
+    def test_index_is_built_once_and_refreshed_on_new_tags(self):
+        self.suggest('py')
+        with self.assertNumQueries(0):
+            self.suggest('pyt')
+        Tag.objects.create(name='pyramids')
+        self.assertIn(('pyramids', 0), self.suggest('pyr'))
+
+    def test_tag_index_bisects_prefix_range(self):
+        index = tags.TagIndex([('art', 1), ('maths', 5), ('math', 2), ('mathematics', 9), ('mb', 3)])
+        self.assertEqual(index.suggest('math'), [('mathematics', 9), ('maths', 5), ('math', 2)])
+
+
+class ResourceFormTagTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        Tag.objects.create(name='python')
+
+    def save_form(self, tag_list):
+        form = ResourceForm(data={'title': 'Notes', 'description': 'x', 'tag_list': tag_list})
+        self.assertTrue(form.is_valid(), form.errors)
+        resource = form.save(commit=False)
+        resource.author = self.author
+        resource.save()
+        with CaptureQueriesContext(connection) as queries:
+            form.save_m2m()
+        return resource, len(queries)
+
+    def test_tags_are_normalized_and_deduplicated(self):
+        resource, _ = self.save_form(' Python,  Machine   Learning, python,, machine learning ')
+        self.assertEqual(
+            sorted(resource.tags.values_list('name', flat=True)), ['machine learning', 'python']
+        )
+        self.assertEqual(Tag.objects.filter(name='python').count(), 1)
+
+    def test_tag_queries_do_not_grow_with_tag_count(self):
+        _, few = self.save_form('python, new1')
+        _, many = self.save_form(', '.join(['python'] + [f'tag{n}' for n in range(10)]))
+        self.assertEqual(few, many)
+
+    def test_create_view_saves_resource_once(self):
+        self.client.login(username='author', password='pass12345')
+        saves = []
+        def count(sender, **kwargs):
+            saves.append(kwargs['created'])
+        post_save.connect(count, sender=Resource)
+        try:
+            response = self.client.post(reverse('resources:resource_create'), {
+                'title': 'Notes', 'description': 'x', 'tag_list': 'python, exams',
+            })
+        finally:
+            post_save.disconnect(count, sender=Resource)
+        resource = Resource.objects.get()
+        self.assertRedirects(response, reverse('resources:resource_detail', args=[resource.pk]))
+        self.assertEqual(saves, [True])
+        self.assertEqual(resource.tag_count, 2)
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings = self.settings(MEDIA_ROOT=self.media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.author = User.objects.create_user(username='author', password='pass12345')
+
+    def upload(self, filename, content=b'%PDF-1.4 lecture notes'):
+        return Resource.objects.create(
+            title=filename, description='x', author=self.author,
+            file=SimpleUploadedFile(filename, content),
+        )
+
+    def stored_files(self):
+        return sorted(resource_storage.blob_names())
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.upload('Week1.PDF')
+        second = self.upload('copy of week1.pdf')
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertTrue(first.file.name.startswith('resources/blobs/'))
+        self.assertTrue(first.file.name.endswith('.pdf'))
+        self.assertEqual((first.file_name, second.file_name), ('Week1.PDF', 'copy of week1.pdf'))
+        self.assertEqual(self.stored_files(), [first.file.name])
+        self.assertEqual(FileBlob.objects.get(name=first.file.name).ref_count, 2)
+        with resource_storage.open(second.file.name) as stored:
+            self.assertEqual(stored.read(), b'%PDF-1.4 lecture notes')
+
+    def test_unreferenced_blobs_are_collected(self):
+        first = self.upload('a.pdf')
+        second = self.upload('b.pdf')
+        other = self.upload('c.pdf', b'different content')
+        first.delete()
+        call_command('collect_resource_blobs', grace_minutes=0, stdout=StringIO())
+        self.assertEqual(len(self.stored_files()), 2)
+
+        second.delete()
+        other.file = SimpleUploadedFile('c2.pdf', b'replacement')
+        other.save()
+        call_command('collect_resource_blobs', grace_minutes=0, stdout=StringIO())
+        self.assertEqual(self.stored_files(), [other.file.name])
+        self.assertEqual(list(FileBlob.objects.values_list('name', 'ref_count')), [(other.file.name, 1)])
+
+    def test_file_still_in_use_survives_a_lagging_count(self):
+        resource = self.upload('a.pdf')
+        # As if the process died between the save and its post_save signal
+        FileBlob.objects.filter(name=resource.file.name).update(ref_count=0)
+        out = StringIO()
+        call_command('collect_resource_blobs', grace_minutes=0, stdout=out)
+        self.assertIn('Deleted 0 unused files', out.getvalue())
+        self.assertEqual(self.stored_files(), [resource.file.name])
+        self.assertTrue(FileBlob.objects.filter(name=resource.file.name).exists())
+
+    def test_orphaned_files_respect_grace_period(self):
+        orphan = resource_storage.save('resources/stray.pdf', SimpleUploadedFile('stray.pdf', b'orphan'))
+        call_command('collect_resource_blobs', stdout=StringIO())
+        self.assertIn(orphan, self.stored_files())
+        call_command('collect_resource_blobs', grace_minutes=0, stdout=StringIO())
+        self.assertEqual(self.stored_files(), [])
+
+
+class ResourceDownloadTests(TestCase):
+    content = bytes(range(256)) * 4
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings = self.settings(MEDIA_ROOT=self.media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        author = User.objects.create_user(username='author', password='pass12345')
+        self.resource = Resource.objects.create(
+            title='Tutorial', description='x', author=author,
+            file=SimpleUploadedFile('Tutorial_EDIT.pdf', self.content),
+        )
+        self.url = reverse('resources:resource_download', args=[self.resource.pk])
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_full_download(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.content)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('Tutorial_EDIT.pdf', response['Content-Disposition'])
+        digest = self.resource.file.name.rsplit('/', 1)[1].split('.')[0]
+        self.assertEqual(response['ETag'], f'"{digest}"')
+
+    def test_conditional_requests(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        last_modified = self.client.get(self.url)['Last-Modified']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MATCH='"other"').status_code, 412)
+
+    def test_byte_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.content)}')
+        self.assertEqual(self.body(response), self.content[10:20])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-4')
+        self.assertEqual(self.body(response), self.content[-4:])
+        response = self.client.get(self.url, HTTP_RANGE='bytes=1000-')
+        self.assertEqual(self.body(response), self.content[1000:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_invalid_and_unsatisfiable_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=5-3')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.body(response)), len(self.content))
+
+        self.assertEqual(parse_range('bytes=-4', 0), False)
+        self.assertEqual(parse_range('bytes=0-', 0), False)
+        self.assertEqual(parse_range('bytes=5-3', 10), None)
+        self.assertEqual(parse_range('bytes=8-20', 10), (8, 9))
+
+    def test_stale_if_range_gets_full_body(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.body(response)), len(self.content))
+
+    def test_accel_modes(self):
+        with self.settings(RESOURCES_DOWNLOAD_ACCEL='x-accel'):
+            response = self.client.get(self.url)
+            self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.resource.file.name)
+            self.assertEqual(response.content, b'')
+        with self.settings(RESOURCES_DOWNLOAD_ACCEL='x-sendfile'):
+            response = self.client.get(self.url)
+            self.assertEqual(response['X-Sendfile'], self.resource.file.path)
+
+    def test_missing_file(self):
+        Resource.objects.filter(pk=self.resource.pk).update(file='')
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+
+
+class TrendingTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.voters = [User.objects.create_user(username=f'voter{n}') for n in range(12)]
+
+    def create(self, title, age):
+        resource = Resource.objects.create(title=title, description='x', author=self.author)
+        Resource.objects.filter(pk=resource.pk).update(created_at=timezone.now() - age)
+        trending.rebuild_hot_scores()
+        return resource
+
+    def stored_score(self, resource):
+        return Resource.objects.values_list('hot_score', flat=True).get(pk=resource.pk)
+
+    def test_new_resources_are_scored(self):
+        resource = Resource.objects.create(title='Fresh', description='x', author=self.author)
+        resource.refresh_from_db()
+        self.assertAlmostEqual(resource.hot_score, trending.hot_score(0, 0, resource.created_at))
+
+    def test_votes_and_comments_update_score(self):
+        resource = self.create('Notes', timedelta(hours=1))
+        before = self.stored_score(resource)
+        resource.upvotes.add(*self.voters[:9])
+        Comment.objects.create(resource=resource, author=self.author, text='Great')
+        resource.refresh_from_db()
+        self.assertGreater(resource.hot_score, before)
+        self.assertAlmostEqual(resource.hot_score, trending.hot_score(9, 1, resource.created_at))
+        # The batch rebuild agrees with the incremental updates
+        self.assertEqual(trending.rebuild_hot_scores(), 0)
+
+    def test_refresh_writes_in_one_statement(self):
+        resources = [self.create(f'R{n}', timedelta(hours=n)) for n in range(5)]
+        Resource.objects.update(upvote_count=3, hot_score=0)
+        with self.assertNumQueries(2):
+            trending.refresh_hot_scores([resource.pk for resource in resources])
+        for resource in resources:
+            resource.refresh_from_db()
+            self.assertAlmostEqual(resource.hot_score, trending.hot_score(3, 0, resource.created_at))
+
+    def test_trending_sort(self):
+        old_popular = self.create('Old but popular', timedelta(days=3))
+        old_popular.upvotes.add(*self.voters)
+        recent = self.create('Recent', timedelta(hours=2))
+        recent.upvotes.add(self.voters[0])
+        quiet = self.create('Quiet', timedelta(hours=12))
+
+        response = self.client.get(reverse('resources:resource_list'), {'sort': 'trending'})
+        self.assertEqual([r.title for r in response.context['page_obj']], ['Recent', 'Quiet', 'Old but popular'])
+        self.assertEqual(response.context['filter_query'], 'sort=trending')
+
+        # Enough activity lifts an older resource above newer, quieter ones
+        quiet.upvotes.add(*self.voters)
+        response = self.client.get(reverse('resources:resource_list'), {'sort': 'trending'})
+        self.assertEqual([r.title for r in response.context['page_obj']][0], 'Quiet')
+
+
+class RelatedResourceTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.tags = {name: Tag.objects.create(name=name) for name in 'abcdef'}
+
+    def create(self, title, tag_names):
+        resource = Resource.objects.create(title=title, description='x', author=self.author)
+        resource.tags.set([self.tags[name] for name in tag_names])
+        return resource
+
+    def links(self, resource):
+        return [
+            (link.related.title, round(link.score, 3))
+            for link in resource.related_links.select_related('related').order_by('-score', 'related_id')
+        ]
+
+    def test_rebuild_ranks_by_jaccard(self):
+        target = self.create('target', 'abc')
+        self.create('same', 'abc')
+        self.create('close', 'abd')
+        self.create('far', 'aef')
+        self.create('unrelated', 'f')
+        related.rebuild_related()
+        self.assertEqual(self.links(target), [('same', 1.0), ('close', 0.5), ('far', 0.2)])
+
+        incidence = related.TagIncidence.load()
+        row = incidence.row[target.pk]
+        self.assertEqual(round(incidence.similarities(row).max(), 3), 1.0)
+        self.assertEqual(related.rebuild_related(top_k=1), 5)
+
+    def test_tag_changes_refresh_incrementally(self):
+        first = self.create('first', 'ab')
+        second = self.create('second', 'cd')
+        related.rebuild_related()
+        self.assertEqual(self.links(first), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.tags.add(self.tags['a'])
+        self.assertEqual(self.links(second), [('first', 0.25)])
+        self.assertEqual(self.links(first), [('second', 0.25)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.tags.remove(self.tags['a'])
+        self.assertEqual(self.links(second), [])
+        self.assertEqual(self.links(first), [])
+
+    def test_detail_page_reads_stored_neighbours(self):
+        target = self.create('target', 'abc')
+        self.create('neighbour', 'ab')
+        related.rebuild_related()
+        response = self.client.get(reverse('resources:resource_detail', args=[target.pk]))
+        self.assertEqual([r.title for r in response.context['related_resources']], ['neighbour'])
+        self.assertContains(response, 'Related Resources')
+        self.assertEqual(RelatedResource.objects.count(), 2)
+
+
+class ResourceCommentPaginationTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user(username='author', password='pass12345')
+        self.resource = Resource.objects.create(title='Notes', description='x', author=author)
+        self.commenters = [User.objects.create_user(username=f'c{n}') for n in range(3)]
+        for user in self.commenters:
+            Profile.objects.create(user=user)
+
+    def add_comments(self, count):
+        for n in range(count):
+            Comment.objects.create(
+                resource=self.resource, author=self.commenters[n % 3], text=f'comment {n}'
+            )
+
+    def detail(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('resources:resource_detail', args=[self.resource.pk]))
+        return response, len(queries)
+
+    def test_detail_queries_do_not_grow_with_comments(self):
+        self.add_comments(2)
+        _, few = self.detail()
+        self.add_comments(40)
+        response, many = self.detail()
+        self.assertEqual(few, many)
+        self.assertEqual(len(response.context['comments']), 20)
+        self.assertContains(response, 'Load more comments')
+
+    def test_load_more_walks_every_comment_once(self):
+        self.add_comments(45)
+        url = reverse('resources:resource_comments', args=[self.resource.pk])
+        cursor = self.detail()[0].context['comments'].next_cursor
+        seen = 20
+        while cursor:
+            data = self.client.get(url, {'cursor': cursor}).json()
+            seen += data['html'].count('<h6')
+            cursor = data['next_cursor']
+        self.assertEqual(seen, 45)
+        self.assertEqual(self.client.get(reverse('resources:resource_comments', args=[999])).status_code, 404)
+
+
+class ResourceFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.resource = Resource.objects.create(
+            title='Linear algebra notes', description='Week 1-6', author=self.author
+        )
+        self.resource.tags.add(Tag.objects.create(name='maths'))
+
+    def test_atom_feed_lists_resources_with_tags(self):
+        response = self.client.get(reverse('resources:resource_atom_feed'))
+        self.assertEqual(response['Content-Type'], 'application/atom+xml; charset=utf-8')
+        self.assertContains(response, '<title>Linear algebra notes</title>')
+        self.assertContains(response, '<category term="maths"')
+
+    def test_not_modified_until_a_resource_is_added(self):
+        url = reverse('resources:resource_feed')
+        first = self.client.get(url)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        Resource.objects.create(
+            title='Newer notes', description='Week 7', author=self.author,
+            created_at=self.resource.created_at,
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertContains(response, 'Newer notes')
+
+    def test_edit_and_retag_change_etag(self):
+        url = reverse('resources:resource_feed')
+        etag = self.client.get(url)['ETag']
+        self.resource.description = 'Week 1-8'
+        self.resource.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Week 1-8')
+
+        etag = response['ETag']
+        self.resource.tags.add(Tag.objects.create(name='algebra'))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, '<category>algebra</category>')
@@ -0,0 +1,64 @@
+"""
+Time-decayed "trending" score for resources.
+
+    hot = log10(max(upvotes + COMMENT_WEIGHT * comments, 1)) + age / DECAY_SECONDS
+
+where age is the creation time in seconds since EPOCH. Every DECAY_SECONDS
+a resource is newer counts for as much as ten times the activity, so older
+resources sink without their stored scores ever being rewritten; a score
+only changes when the resource's own counters do.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+import numpy as np
+from django.db import transaction
+from .models import Resource
+
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+DECAY_SECONDS = 45000
+COMMENT_WEIGHT = 0.5
+BATCH_SIZE = 1000
+
+
+def hot_score(upvotes, comments, created_at):
+    activity = upvotes + COMMENT_WEIGHT * comments
+    age = (created_at - EPOCH).total_seconds()
+    return math.log10(max(activity, 1)) + age / DECAY_SECONDS
+
+
+def hot_scores(upvotes, comments, created_at):
+    """Vectorized hot_score over arrays of counts and POSIX creation times"""
+    activity = np.asarray(upvotes, dtype=float) + COMMENT_WEIGHT * np.asarray(comments, dtype=float)
+    age = np.asarray(created_at, dtype=float) - EPOCH.timestamp()
+    return np.log10(np.maximum(activity, 1)) + age / DECAY_SECONDS
+
+
+def refresh_hot_scores(pks):
+    """Recompute the stored score of a few resources after their counters moved"""
+    rows = list(Resource.objects.filter(pk__in=list(pks)).values_list(
+        'pk', 'upvote_count', 'comment_count', 'created_at'
+    ))
+    if not rows:
+        return
+    pks, upvotes, comments, created_at = zip(*rows)
+    scores = hot_scores(upvotes, comments, [value.timestamp() for value in created_at])
+    updates = [Resource(pk=pk, hot_score=float(score)) for pk, score in zip(pks, scores)]
+    Resource.objects.bulk_update(updates, ['hot_score'], batch_size=BATCH_SIZE)
+
+
+def rebuild_hot_scores():
+    """Recompute every score in one vectorized pass; returns the number changed"""
+    rows = list(Resource.objects.order_by().values_list(
+        'pk', 'upvote_count', 'comment_count', 'created_at', 'hot_score'
+    ))
+    if not rows:
+        return 0
+    pks, upvotes, comments, created_at, stored = zip(*rows)
+    scores = hot_scores(upvotes, comments, [value.timestamp() for value in created_at])
+    changed = np.flatnonzero(~np.isclose(scores, np.asarray(stored, dtype=float), rtol=0, atol=1e-9))
+
+    updates = [Resource(pk=pks[i], hot_score=float(scores[i])) for i in changed]
+    with transaction.atomic():
+        Resource.objects.bulk_update(updates, ['hot_score'], batch_size=BATCH_SIZE)
+    return len(updates)
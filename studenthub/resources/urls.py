@@ -1,12 +1,18 @@
 from django.urls import path
 from . import views
+from .feeds import NewResourcesFeed, NewResourcesAtomFeed
 
 app_name = 'resources'
 
 urlpatterns = [
     path('', views.resource_list, name='resource_list'),
+    path('feed/', NewResourcesFeed(), name='resource_feed'),
+    path('feed/atom/', NewResourcesAtomFeed(), name='resource_atom_feed'),
     path('new/', views.resource_create, name='resource_create'),
+    path('tags/autocomplete/', views.tag_autocomplete, name='tag_autocomplete'),
     path('<int:pk>/', views.resource_detail, name='resource_detail'),
+    path('<int:pk>/download/', views.resource_download, name='resource_download'),
+    path('<int:pk>/comments/', views.resource_comments, name='resource_comments'),
     path('<int:pk>/comment/', views.add_comment, name='add_comment'),
     path('<int:pk>/vote/', views.toggle_upvote, name='toggle_upvote'),
 ]
@@ -1,52 +1,99 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q, Count
+from django.db.models import Exists, OuterRef, Q
 from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
+from django.template.loader import render_to_string
+from django.views.decorators.http import require_safe
+from studenthub.pagination import comment_page
+from studenthub.viewcounts import record_view
 from .models import Resource, Comment, Tag
+from .downloads import serve_file
 from .forms import ResourceForm, CommentForm
+from .related import related_resources
+from .tags import SUGGESTION_LIMIT, suggest_tags
+from .votes import has_upvoted, toggle_upvote as toggle_vote
+
+
+SORT_ORDERS = {
+    'newest': ('-created_at',),
+    'trending': ('-hot_score', '-created_at'),
+    'most_viewed': ('-view_count', '-created_at'),
+}
 
 
 def resource_list(request):
-    resources = Resource.objects.annotate(
-        upvote_count=Count('upvotes'),
-        comment_count=Count('comments')
-    ).order_by('-created_at')
+    sort = request.GET.get('sort')
+    if sort not in SORT_ORDERS:
+        sort = 'newest'
+    resources = Resource.objects.for_listing().order_by(*SORT_ORDERS[sort])
     
     # Search functionality
     query = request.GET.get('q')
     if query:
+        # Tag matches go through EXISTS so the list never joins (and needs
+        # DISTINCT over) the tag rows
+        tagged = Resource.tags.through.objects.filter(
+            resource=OuterRef('pk'), tag__name__icontains=query
+        )
         resources = resources.filter(
             Q(title__icontains=query) |
             Q(description__icontains=query) |
-            Q(tags__name__icontains=query)
-        ).distinct()
+            Exists(tagged)
+        )
     
     # Pagination
     paginator = Paginator(resources, 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
+    # Active search and sort, for building page links
+    filter_query = request.GET.copy()
+    filter_query.pop('page', None)
+    
     context = {
         'page_obj': page_obj,
         'query': query,
+        'sort': sort,
+        'filter_query': filter_query.urlencode(),
     }
     return render(request, 'resources/resource_list.html', context)
 
 
 def resource_detail(request, pk):
     resource = get_object_or_404(Resource, pk=pk)
-    comments = resource.comments.all()
+    record_view(resource)
+    comments = comment_page(request, resource.comments.all())
     comment_form = CommentForm()
     
     context = {
         'resource': resource,
         'comments': comments,
         'comment_form': comment_form,
+        'has_upvoted': has_upvoted(request.user, resource),
+        'related_resources': related_resources(resource),
     }
     return render(request, 'resources/resource_detail.html', context)
 
 
+def resource_comments(request, pk):
+    """The next page of comments as an HTML fragment plus the cursor after it"""
+    resource = get_object_or_404(Resource.objects.only('pk'), pk=pk)
+    comments = comment_page(request, resource.comments.all())
+    html = render_to_string('includes/comments.html', {'comments': comments}, request=request)
+    return JsonResponse({'html': html, 'next_cursor': comments.next_cursor})
+
+
+@require_safe
+def resource_download(request, pk):
+    resource = get_object_or_404(Resource.objects.only('file', 'file_name'), pk=pk)
+    if not resource.file or not resource.file.storage.exists(resource.file.name):
+        raise Http404('This resource has no file.')
+    filename = resource.file_name or resource.file.name.rsplit('/', 1)[-1]
+    return serve_file(request, resource.file.storage, resource.file.name, filename)
+
+
 @login_required
 def resource_create(request):
     if request.method == 'POST':
@@ -55,7 +102,7 @@ def resource_create(request):
             resource = form.save(commit=False)
             resource.author = request.user
             resource.save()
-            form.save()  # Save tags
+            form.save_m2m()  # Save tags
             messages.success(request, 'Resource created successfully!')
             return redirect('resources:resource_detail', pk=resource.pk)
     else:
@@ -88,13 +135,22 @@ def add_comment(request, pk):
 @login_required
 def toggle_upvote(request, pk):
     resource = get_object_or_404(Resource, pk=pk)
-    user = request.user
     
-    if user in resource.upvotes.all():
-        resource.upvotes.remove(user)
-        messages.info(request, 'Upvote removed.')
-    else:
-        resource.upvotes.add(user)
+    if toggle_vote(request.user, resource):
         messages.success(request, 'Resource upvoted!')
+    else:
+        messages.info(request, 'Upvote removed.')
     
     return redirect('resources:resource_detail', pk=pk)
+
+
+def tag_autocomplete(request):
+    """JSON tag suggestions for the prefix in ?q=, most used first"""
+    try:
+        limit = min(max(int(request.GET.get('limit', SUGGESTION_LIMIT)), 1), 20)
+    except ValueError:
+        limit = SUGGESTION_LIMIT
+    suggestions = suggest_tags(request.GET.get('q', ''), limit)
+    return JsonResponse({
+        'results': [{'name': name, 'count': count} for name, count in suggestions],
+    })
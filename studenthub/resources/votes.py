@@ -0,0 +1,148 @@
+"""
+Upvote toggling, optionally through a write-behind buffer.
+
+With RESOURCES_VOTE_BUFFER enabled, toggles are not written to the upvotes
+join table straight away. Each toggle appends (user, resource, upvoted) to
+a write-behind log in the cache (studenthub/writebehind.py) and records the
+voter's latest state, so rapid
+toggles on the same pair coalesce. flush_vote_buffer() applies the net
+change per pair in bulk and recounts the affected resources from the join
+table, so upvote_count always converges on the stored votes.
+
+The buffer needs a cache shared by every process (Redis, memcached); with
+the per-process LocMemCache only enable it on single-process deployments.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from studenthub.writebehind import ENTRY_TIMEOUT, FLUSH_BATCH, WriteBehindLog
+from .models import Resource
+from .trending import refresh_hot_scores
+
+
+LOG = WriteBehindLog('resources:votes')
+
+
+def buffer_enabled():
+    return getattr(settings, 'RESOURCES_VOTE_BUFFER', False)
+
+
+def _state_key(user_id, resource_id):
+    return f'resources:votes:state:{resource_id}:{user_id}'
+
+
+def _stored_upvote(user_id, resource_id):
+    """Membership check on the join table's (resource, user) unique index"""
+    return Resource.upvotes.through.objects.filter(
+        resource_id=resource_id, user_id=user_id
+    ).exists()
+
+
+def has_upvoted(user, resource):
+    """Whether the user currently upvotes the resource, buffered toggles included"""
+    if not user.is_authenticated:
+        return False
+    if buffer_enabled():
+        state = cache.get(_state_key(user.pk, resource.pk))
+        if state is not None:
+            return state[0]
+    return _stored_upvote(user.pk, resource.pk)
+
+
+def toggle_upvote(user, resource):
+    """Flip the user's upvote on the resource; returns the new state"""
+    upvoted = not has_upvoted(user, resource)
+    if not buffer_enabled():
+        if upvoted:
+            resource.upvotes.add(user)
+        else:
+            resource.upvotes.remove(user)
+        return upvoted
+
+    _log(LOG.next_sequence(), user.pk, resource.pk, upvoted)
+    return upvoted
+
+
+def _log(sequence, user_id, resource_id, upvoted):
+    LOG.write(sequence, (user_id, resource_id, upvoted))
+    cache.set(_state_key(user_id, resource_id), (upvoted, sequence), ENTRY_TIMEOUT)
+    if LOG.written_late(sequence):
+        # A flush already gave up on this number: log the toggle again,
+        # unless a newer toggle of the same pair has replaced it
+        state = cache.get(_state_key(user_id, resource_id))
+        if state is not None and state[1] == sequence:
+            _log(LOG.next_sequence(), user_id, resource_id, upvoted)
+
+
+def pending_votes():
+    """Number of buffered toggles not yet flushed"""
+    return LOG.pending()
+
+
+def _apply(latest):
+    """Write the net {(user_id, resource_id): upvoted} changes in one transaction"""
+    through = Resource.upvotes.through
+    added = [pair for pair, upvoted in latest.items() if upvoted]
+    removed = [pair for pair, upvoted in latest.items() if not upvoted]
+
+    with transaction.atomic():
+        through.objects.bulk_create(
+            [through(user_id=user_id, resource_id=resource_id) for user_id, resource_id in added],
+            batch_size=FLUSH_BATCH,
+            ignore_conflicts=True,
+        )
+        for start in range(0, len(removed), FLUSH_BATCH):
+            condition = Q()
+            for user_id, resource_id in removed[start:start + FLUSH_BATCH]:
+                condition |= Q(user_id=user_id, resource_id=resource_id)
+            through.objects.filter(condition).delete()
+        # Bulk writes skip m2m_changed, so recount from the join table here
+        touched = {resource_id for _, resource_id in latest}
+        Resource.recount_upvotes(touched)
+        refresh_hot_scores(touched)
+
+
+def _apply_late_entries(skipped):
+    """
+    Apply skipped gaps whose toggle was written after all.
+
+    Runs after the flushed mark has moved past them: a toggle written before
+    this re-read is applied here, one written after it sees the new mark and
+    logs itself again (see _log), so none is left behind in the voter state.
+    """
+    for n, (user_id, resource_id, _) in LOG.get_many(skipped).items():
+        key = _state_key(user_id, resource_id)
+        state = cache.get(key)
+        # Only when no newer toggle of the pair is waiting in the log
+        if state is not None and state[1] == n:
+            _apply({(user_id, resource_id): state[0]})
+            cache.delete(key)
+
+
+def _apply_entries(entries):
+    """Apply the latest logged toggle of each pair; returns the number of pairs"""
+    latest, applied = {}, {}
+    for n, (user_id, resource_id, upvoted) in entries:
+        latest[(user_id, resource_id)] = upvoted
+        applied[(user_id, resource_id)] = n
+    if latest:
+        _apply(latest)
+
+    # Forget voter states that no later toggle has overwritten
+    state_keys = {pair: _state_key(*pair) for pair in applied}
+    states = cache.get_many(list(state_keys.values()))
+    cache.delete_many([
+        key for pair, key in state_keys.items()
+        if key in states and states[key][1] == applied[pair]
+    ])
+    return len(latest)
+
+
+def flush_vote_buffer():
+    """
+    Apply every buffered toggle up to now; returns (toggles, pairs written).
+
+    Returns (0, 0) if another flush holds the lock or nothing could be applied yet.
+    """
+    return LOG.flush(_apply_entries, late=_apply_late_entries) or (0, 0)
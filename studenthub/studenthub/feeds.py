@@ -0,0 +1,88 @@
+"""
+Syndication feeds rendered once per content version.
+
+A feed's version is the newest created_at of its model plus the row count,
+read with one indexed aggregate, and the time an item of the model last
+changed, kept in the cache by mark_changed() from the apps' post_save and
+post_delete signals. The rendered XML is cached under that version, and
+the response carries an ETag and Last-Modified derived from it, so a poller
+that already has the current feed gets a 304 without the feed being built
+or even read from the cache. Adding, editing or deleting an item moves the
+version.
+"""
+import hashlib
+import time
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+FEED_ITEMS = 20
+FEED_CACHE_TIMEOUT = 60 * 60
+
+
+def _changed_key(model):
+    return f'feed:changed:{model._meta.label_lower}'
+
+
+def changed_at(model):
+    """Timestamp of the last change to an item of model"""
+    # Unknown after the cache is emptied: assume now, so no poller keeps a stale feed
+    return cache.get_or_set(_changed_key(model), time.time, None)
+
+
+def mark_changed(model):
+    """Move the version of every feed over model (call after an item is saved or deleted)"""
+    cache.set(_changed_key(model), time.time(), None)
+
+
+class CachedFeed(Feed):
+    """Feed over `model`, newest first, cached per version (see module docstring)"""
+
+    model = None
+
+    def get_queryset(self):
+        return self.model.objects.order_by('-created_at')
+
+    def items(self):
+        return self.get_queryset()[:FEED_ITEMS]
+
+    def item_pubdate(self, item):
+        return item.created_at
+
+    def version(self):
+        """(newest created_at or None, row count, last change timestamp)"""
+        stats = self.model.objects.order_by().aggregate(newest=Max('created_at'), count=Count('pk'))
+        return stats['newest'], stats['count'], changed_at(self.model)
+
+    def cache_key(self, request, version):
+        # Links in the feed are absolute, so the site root is part of the key
+        source = f'{type(self).__module__}.{type(self).__qualname__}:{request.build_absolute_uri("/")}:{version}'
+        return 'feed:' + hashlib.sha256(source.encode()).hexdigest()
+
+    def __call__(self, request, *args, **kwargs):
+        newest, count, changed = self.version()
+        created = newest.timestamp() if newest else 0
+        last_modified = int(max(created, changed))
+        version = f'{count}-{created}-{changed}'
+        etag = quote_etag(f'{self.feed_type.__name__.lower()}-{version}')
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        key = self.cache_key(request, version)
+        cached = cache.get(key)
+        if cached is None:
+            rendered = super().__call__(request, *args, **kwargs)
+            cached = (rendered.content, rendered['Content-Type'])
+            cache.set(key, cached, FEED_CACHE_TIMEOUT)
+
+        content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
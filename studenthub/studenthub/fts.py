@@ -0,0 +1,111 @@
+"""
+SQLite FTS5 indexes over a model's text columns.
+
+A FullTextIndex is an FTS5 table whose rowid is the primary key of a row in
+the source table, kept current by the owning app's signals. Searches stay
+inside the queryset's SQL (a rowid subquery plus a correlated bm25 rank),
+so they run lazily, after any other filters, and counts see every match.
+On other databases, or an SQLite built without FTS5, available() is False
+and the caller falls back to its own search.
+"""
+import re
+from django.db import connections
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return WORD_RE.findall(text.lower())
+
+
+def build_match_query(terms):
+    """Turn free text into an FTS5 query: every word must match as a prefix"""
+    return ' '.join(f'"{word}"*' for word in tokenize(terms))
+
+
+class FullTextIndex:
+    """FTS5 table `table` over `columns` of `source`, ranked with bm25 `weights`"""
+
+    def __init__(self, table, source, columns, weights):
+        self.table = table
+        self.source = source
+        self.columns = tuple(columns)
+        self.weights = tuple(weights)
+        self._available = {}
+
+    def available(self, using='default'):
+        """Whether the FTS5 table exists on this database (SQLite only)"""
+        connection = connections[using]
+        if connection.vendor != 'sqlite':
+            return False
+        key = (using, str(connection.settings_dict['NAME']))
+        if key not in self._available:
+            self._available[key] = self.table in connection.introspection.table_names()
+        return self._available[key]
+
+    def create(self, using='default'):
+        """Create the FTS5 table if the SQLite build supports it"""
+        connection = connections[using]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                f"{', '.join(self.columns)}, tokenize='unicode61 remove_diacritics 2')"
+            )
+        self._available.pop((using, str(connection.settings_dict['NAME'])), None)
+
+    def rebuild(self, using='default'):
+        """Repopulate the index from the source table; returns the row count"""
+        columns = ', '.join(self.columns)
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, {columns}) SELECT id, {columns} FROM {self.source}"
+            )
+            count = cursor.rowcount
+            cursor.execute(f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')")
+        return count
+
+    def covers(self, update_fields):
+        """Whether a save with these update_fields can change the indexed text"""
+        return update_fields is None or bool(set(self.columns) & set(update_fields))
+
+    def add(self, obj, using='default'):
+        """Index obj, replacing any earlier entry for it"""
+        if not self.available(using):
+            return
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [obj.pk])
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, {', '.join(self.columns)}) "
+                f"VALUES (%s, {', '.join(['%s'] * len(self.columns))})",
+                [obj.pk, *(getattr(obj, column) for column in self.columns)],
+            )
+
+    def remove(self, pk, using='default'):
+        if not self.available(using):
+            return
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [pk])
+
+    def search(self, queryset, terms):
+        """
+        Filter queryset to the rows matching terms, best bm25 first, with the
+        rank as search_rank. Only call this when available() and terms
+        contain at least one word.
+        """
+        connection = connections[queryset.db]
+        match = build_match_query(terms)
+        weights = ', '.join(str(weight) for weight in self.weights)
+        row_id = f'{connection.ops.quote_name(queryset.model._meta.db_table)}.'
+        row_id += connection.ops.quote_name(queryset.model._meta.pk.column)
+        matches = RawSQL(f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", [match])
+        rank = RawSQL(
+            f"SELECT bm25({self.table}, {weights}) FROM {self.table} "
+            f"WHERE {self.table} MATCH %s AND rowid = {row_id}",
+            [match],
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=matches).annotate(search_rank=rank).order_by('search_rank', '-created_at')
@@ -0,0 +1,115 @@
+"""
+Keyset (cursor) pagination shared by the request lists and comment threads.
+"""
+import base64
+import json
+from datetime import datetime
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(direction, obj, field):
+    payload = json.dumps([direction, getattr(obj, field).isoformat(), obj.pk])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if direction not in ('next', 'prev'):
+            raise ValueError(direction)
+        return direction, datetime.fromisoformat(value), int(pk)
+    except (ValueError, TypeError, json.JSONDecodeError) as exc:
+        raise InvalidCursor(token) from exc
+
+
+class CursorPage:
+    """One window of a keyset-paginated queryset"""
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset paginator over (field, pk), newest first.
+
+    Each page is a single indexed range query of per_page + 1 rows, with no
+    OFFSET and no COUNT. The total is only counted if something reads
+    paginator.count.
+    """
+
+    def __init__(self, queryset, per_page, field='created_at'):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+
+    @cached_property
+    def count(self):
+        return self.queryset.count()
+
+    def get_page(self, cursor=None):
+        try:
+            direction, value, pk = decode_cursor(cursor) if cursor else (None, None, None)
+        except InvalidCursor:
+            direction = None
+
+        field = self.field
+        if direction == 'next':
+            queryset = self.queryset.filter(
+                Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk})
+            ).order_by(f'-{field}', '-pk')
+        elif direction == 'prev':
+            queryset = self.queryset.filter(
+                Q(**{f'{field}__gt': value}) | Q(**{field: value, 'pk__gt': pk})
+            ).order_by(field, 'pk')
+        else:
+            queryset = self.queryset.order_by(f'-{field}', '-pk')
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == 'prev':
+            rows.reverse()
+
+        has_next = has_more if direction != 'prev' else True
+        has_previous = has_more if direction == 'prev' else direction is not None
+        next_cursor = encode_cursor('next', rows[-1], field) if rows and has_next else None
+        previous_cursor = encode_cursor('prev', rows[0], field) if rows and has_previous else None
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+
+COMMENTS_PER_PAGE = 20
+
+
+def comment_page(request, comments):
+    """One newest-first page of comments, keyset paginated on (created_at, id)"""
+    paginator = CursorPaginator(comments.select_related('author__profile'), COMMENTS_PER_PAGE)
+    return paginator.get_page(request.GET.get('cursor'))
@@ -91,3 +91,26 @@ MESSAGE_TAGS = {
 }
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Use keyset (?cursor=) pagination on the request lists instead of ?page=N
+REQUESTS_CURSOR_PAGINATION = False
+
+# Buffer resource upvote toggles in the cache and write them in batches with
+# "manage.py flush_upvotes"; needs a cache shared by all processes
+RESOURCES_VOTE_BUFFER = False
+
+# Hand resource downloads to the web server: None, 'x-accel' (nginx, with an
+# internal location at RESOURCES_DOWNLOAD_ACCEL_PREFIX aliased to MEDIA_ROOT)
+# or 'x-sendfile' (Apache mod_xsendfile, lighttpd)
+RESOURCES_DOWNLOAD_ACCEL = None
+RESOURCES_DOWNLOAD_ACCEL_PREFIX = '/protected-media/'
+
+# Render blog posts as Markdown (needs the optional "markdown" package);
+# run "manage.py rerender_posts" after changing this
+BLOG_MARKDOWN = False
+
+# Detail page views are buffered in the cache and written in batches once
+# this many are pending or this many seconds have passed since the last
+# flush (see studenthub/viewcounts.py and "manage.py flush_view_counts")
+VIEW_COUNT_FLUSH_THRESHOLD = 200
+VIEW_COUNT_FLUSH_INTERVAL = 60
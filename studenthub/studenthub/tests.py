@@ -0,0 +1,204 @@
+import re
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import Profile
+from blog.models import Post, PostComment
+from expenses.models import Expense, ExpenseShare
+from requests.models import Request, RequestOffer
+from resources.models import Comment, Resource
+from . import viewcounts
+
+
+# A plan line that walks a whole table without any index
+FULL_SCAN = re.compile(r'\bSCAN (\w+)(?!.*\bINDEX\b)')
+
+# A plan line that sorts the rows instead of reading them in index order
+TEMP_SORT = re.compile(r'\bUSE TEMP B-TREE\b')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class QueryPlanTests(TestCase):
+    """The main query behind each list view must be served from an index"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='planner', password='pass12345')
+
+    def assertIndexed(self, queryset, sorted_after=False):
+        """No full scans, and no sort unless sorted_after says the rows are sorted after the lookup"""
+        plan = queryset.explain()
+        problems = [
+            line for line in plan.splitlines()
+            if FULL_SCAN.search(line) or (not sorted_after and TEMP_SORT.search(line))
+        ]
+        self.assertEqual(problems, [], plan)
+
+    def test_request_queries(self):
+        user = self.user
+        requests = Request.objects.select_related('requester')
+        self.assertIndexed(requests[:12])
+        self.assertIndexed(requests.filter(status='open')[:12])
+        self.assertIndexed(requests.filter(category='books')[:12])
+        self.assertIndexed(Request.objects.filter(requester=user).order_by('-created_at')[:10])
+        self.assertIndexed(Request.objects.filter(status='open', deadline__lt=timezone.now()).order_by('deadline'))
+
+    def test_offer_queries(self):
+        user = self.user
+        self.assertIndexed(
+            RequestOffer.objects.filter(fulfiller=user).select_related('request').order_by('-created_at')[:10]
+        )
+        self.assertIndexed(RequestOffer.objects.filter(fulfiller=user, status='pending'))
+        # Unordered, as in the UPDATE that rejects an accepted offer's siblings
+        self.assertIndexed(RequestOffer.objects.filter(request_id=1, status='pending').order_by())
+
+    def test_resource_and_blog_queries(self):
+        self.assertIndexed(Resource.objects.order_by('-created_at')[:10])
+        self.assertIndexed(Comment.objects.filter(resource_id=1))
+        self.assertIndexed(Post.objects.all()[:10])
+        self.assertIndexed(PostComment.objects.filter(post_id=1))
+
+    def test_trending_query(self):
+        self.assertIndexed(Resource.objects.order_by('-hot_score', '-created_at')[:10])
+
+    def test_most_viewed_queries(self):
+        self.assertIndexed(Request.objects.select_related('requester').order_by('-view_count', '-pk')[:12])
+        self.assertIndexed(Resource.objects.order_by('-view_count', '-created_at')[:10])
+        self.assertIndexed(Post.objects.order_by('-view_count', '-created_at')[:10])
+
+    def test_expense_queries(self):
+        user = self.user
+        # Found through the participants table, so a user's few expenses are sorted afterwards
+        self.assertIndexed(Expense.objects.filter(participants=user).order_by('-created_at'), sorted_after=True)
+        self.assertIndexed(Expense.objects.filter(payer=user).values('amount'))
+
+    def test_expense_share_queries(self):
+        user = self.user
+        self.assertIndexed(
+            ExpenseShare.objects.filter(participant=user).exclude(expense__payer=user).values('amount')
+        )
+
+
+@override_settings(VIEW_COUNT_FLUSH_THRESHOLD=1000, VIEW_COUNT_FLUSH_INTERVAL=3600)
+class ViewCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author', password='pass12345')
+        Profile.objects.create(user=self.user)
+        self.post = Post.objects.create(title='Exam tips', content='Sleep.', author=self.user)
+        self.resource = Resource.objects.create(title='Notes', description='Week 1', author=self.user)
+        self.request_obj = Request.objects.create(
+            title='Calculator', description='For the exam', category='electronics',
+            fee=Decimal('10.00'), requester=self.user,
+        )
+
+    def view(self, name, obj, times=1):
+        for _ in range(times):
+            self.assertEqual(self.client.get(reverse(name, args=[obj.pk])).status_code, 200)
+
+    def counts(self):
+        return [
+            model.objects.get(pk=obj.pk).view_count
+            for model, obj in [(Post, self.post), (Resource, self.resource), (Request, self.request_obj)]
+        ]
+
+    def test_views_are_buffered_until_flushed(self):
+        self.view('blog:post_detail', self.post, 3)
+        self.view('resources:resource_detail', self.resource, 2)
+        with CaptureQueriesContext(connection) as queries:
+            self.view('requests:request_detail', self.request_obj)
+        self.assertFalse([q for q in queries if q['sql'].startswith('UPDATE')])
+        self.assertEqual(self.counts(), [0, 0, 0])
+        self.assertEqual(viewcounts.pending_views(), 6)
+
+        out = StringIO()
+        call_command('flush_view_counts', stdout=out)
+        self.assertIn('Flushed 6 views', out.getvalue())
+        self.assertEqual(self.counts(), [3, 2, 1])
+        self.assertEqual(viewcounts.pending_views(), 0)
+
+        self.view('blog:post_detail', self.post)
+        viewcounts.flush_view_counts()
+        self.assertEqual(self.counts(), [4, 2, 1])
+
+    def test_views_during_a_flush_are_kept(self):
+        viewcounts.record_view(self.post)
+        real_write = viewcounts._write
+
+        def write_then_view(counts):
+            real_write(counts)
+            viewcounts.record_view(self.post)
+
+        with mock.patch.object(viewcounts, '_write', write_then_view):
+            self.assertEqual(viewcounts.flush_view_counts(), 1)
+        self.assertEqual(viewcounts.buffered_views(self.post), 1)
+        self.assertEqual(viewcounts.flush_view_counts(), 1)
+        self.assertEqual(self.counts()[0], 2)
+
+    def test_lost_log_entry_does_not_strand_the_counter(self):
+        viewcounts.record_view(self.post)
+        cache.delete(viewcounts.LOG.entry_key(viewcounts.LOG.flushed() + 1))
+        viewcounts.flush_view_counts()
+        viewcounts.flush_view_counts()  # gives up on the missing entry
+        for _ in range(5):
+            viewcounts.record_view(self.post)
+        self.assertEqual(viewcounts.flush_view_counts(), 6)
+        self.assertEqual(self.counts()[0], 6)
+        self.assertEqual(viewcounts.buffered_views(self.post), 0)
+
+    @override_settings(VIEW_COUNT_FLUSH_THRESHOLD=3)
+    def test_threshold_triggers_a_flush(self):
+        self.view('resources:resource_detail', self.resource, 2)
+        self.assertEqual(self.counts()[1], 0)
+        self.view('resources:resource_detail', self.resource)
+        self.assertEqual(self.counts()[1], 3)
+
+    def test_saving_keeps_flushed_views(self):
+        post = Post.objects.get(pk=self.post.pk)
+        viewcounts.record_view(post)
+        viewcounts.flush_view_counts()
+        post.title = 'Exam tips, revised'
+        post.save()
+        self.assertEqual(self.counts()[0], 1)
+
+    def test_most_viewed_ordering(self):
+        popular = Resource.objects.create(title='Popular', description='Week 2', author=self.user)
+        self.view('resources:resource_detail', popular, 2)
+        viewcounts.flush_view_counts()
+        response = self.client.get(reverse('resources:resource_list'), {'sort': 'most_viewed'})
+        self.assertEqual(list(response.context['page_obj']), [popular, self.resource])
+
+        busy = Request.objects.create(
+            title='Charger', description='USB-C', category='electronics',
+            fee=Decimal('5.00'), requester=self.user,
+        )
+        Request.objects.filter(pk=self.request_obj.pk).update(view_count=5)
+        response = self.client.get(reverse('requests:request_list'), {'sort': 'most_viewed'})
+        self.assertEqual(list(response.context['page_obj']), [self.request_obj, busy])
+        response = self.client.get(reverse('requests:request_list'), {'sort': 'most_viewed', 'cursor': ''})
+        self.assertEqual(list(response.context['page_obj']), [self.request_obj, busy])
+
+    @override_settings(REQUESTS_CURSOR_PAGINATION=True)
+    def test_most_viewed_requests_are_paged_by_number(self):
+        for n in range(12):
+            Request.objects.create(
+                title=f'Request {n}', description='x', category='electronics',
+                fee=Decimal('1.00'), requester=self.user,
+            )
+        Request.objects.filter(pk=self.request_obj.pk).update(view_count=5)
+        url = reverse('requests:request_list')
+        first = self.client.get(url, {'sort': 'most_viewed'}).context['page_obj']
+        self.assertFalse(getattr(first, 'is_cursor', False))
+        self.assertEqual(first[0], self.request_obj)
+        second = self.client.get(url, {'sort': 'most_viewed', 'page': 2}).context['page_obj']
+        self.assertEqual(len(first) + len(second), 13)
+        self.assertFalse({r.pk for r in first} & {r.pk for r in second})
+        self.assertTrue(self.client.get(url).context['page_obj'].is_cursor)
@@ -0,0 +1,145 @@
+"""
+Buffered page-view counters for posts, resources and requests.
+
+A detail page view only increments a per-item counter in the cache; nothing
+is written to the database on the request path. The first view of an item
+since the last flush also appends the item to a write-behind log
+(studenthub/writebehind.py), so a flush knows which counters to read
+without scanning the cache. Each item also remembers the sequence number
+it was last logged under; a view that finds the counter already running but
+that number already passed by a flush (the entry was evicted, or skipped
+as a gap) logs the item again, so its counter is never stranded. flush_view_counts()
+moves the buffered counts into each model's view_count column with one
+F() update per distinct count, then subtracts what it wrote from the cache,
+so views arriving mid-flush are kept for the next one.
+
+A flush runs from the request path once VIEW_COUNT_FLUSH_THRESHOLD views
+are pending or VIEW_COUNT_FLUSH_INTERVAL seconds have passed, and from
+"manage.py flush_view_counts" (e.g. from cron). Views lost if the cache is
+cleared are therefore bounded by whichever limit is hit first. As with the
+vote buffer, every process must share one cache for the management command
+to see their views; with the per-process LocMemCache each process flushes
+its own buffer from its requests.
+"""
+import time
+from collections import defaultdict
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from .writebehind import ENTRY_TIMEOUT, FLUSH_BATCH, WriteBehindLog
+
+
+LOG = WriteBehindLog('views')
+
+PENDING_KEY = 'views:pending'
+LAST_FLUSH_KEY = 'views:last-flush'
+
+
+def _counter_key(label, pk):
+    return f'views:count:{label}:{pk}'
+
+
+def _logged_key(label, pk):
+    return f'views:logged:{label}:{pk}'
+
+
+def _log_item(label, pk):
+    cache.set(_logged_key(label, pk), LOG.append((label, pk)), ENTRY_TIMEOUT)
+
+
+def _needs_logging(label, pk):
+    """Whether the item's log entry is gone although its counter still runs"""
+    values = cache.get_many([_logged_key(label, pk), LOG.flushed_key])
+    sequence = values.get(_logged_key(label, pk))
+    return sequence is None or sequence <= values.get(LOG.flushed_key, 0)
+
+
+def _incr(key, delta=1):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, None)
+        return cache.incr(key, delta)
+
+
+def flush_due():
+    pending = cache.get(PENDING_KEY, 0)
+    if pending >= getattr(settings, 'VIEW_COUNT_FLUSH_THRESHOLD', 200):
+        return True
+    last_flush = cache.get(LAST_FLUSH_KEY)
+    if last_flush is None:
+        cache.add(LAST_FLUSH_KEY, time.time(), None)
+        return False
+    return bool(pending) and time.time() - last_flush >= getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 60)
+
+
+def record_view(obj):
+    """Count one view of a model instance with a view_count field"""
+    label = obj._meta.label_lower
+    if _incr(_counter_key(label, obj.pk)) == 1 or _needs_logging(label, obj.pk):
+        _log_item(label, obj.pk)
+    _incr(PENDING_KEY)
+    if flush_due():
+        flush_view_counts()
+
+
+def pending_views():
+    """Number of buffered views not yet flushed"""
+    return cache.get(PENDING_KEY, 0)
+
+
+def buffered_views(obj):
+    """Views of obj counted since the last flush"""
+    return cache.get(_counter_key(obj._meta.label_lower, obj.pk), 0)
+
+
+def _write(counts):
+    """Add {(label, pk): views} to the stored counters, one UPDATE per distinct count"""
+    grouped = defaultdict(lambda: defaultdict(list))
+    for (label, pk), views in counts.items():
+        grouped[label][views].append(pk)
+    with transaction.atomic():
+        for label, by_views in grouped.items():
+            model = apps.get_model(label)
+            for views, pks in by_views.items():
+                for start in range(0, len(pks), FLUSH_BATCH):
+                    model.objects.filter(pk__in=pks[start:start + FLUSH_BATCH]).update(
+                        view_count=F('view_count') + views
+                    )
+
+
+def _flush_entries(entries):
+    """Write the counters of the logged items; returns the number of views"""
+    keys = {item: _counter_key(*item) for item in {tuple(entry) for _, entry in entries}}
+    values = cache.get_many(list(keys.values()))
+    counts = {item: values[key] for item, key in keys.items() if values.get(key)}
+    if counts:
+        _write(counts)
+
+    for item, views in counts.items():
+        try:
+            remaining = cache.decr(keys[item], views)
+        except ValueError:
+            continue
+        if remaining > 0:
+            # Viewed again during the flush without re-entering the log
+            _log_item(*item)
+    total = sum(counts.values())
+    try:
+        cache.decr(PENDING_KEY, min(total, cache.get(PENDING_KEY, 0)))
+    except ValueError:
+        pass
+    return total
+
+
+def flush_view_counts():
+    """
+    Write every buffered view to the database; returns the number of views.
+
+    Returns 0 if another flush holds the lock.
+    """
+    cache.set(LAST_FLUSH_KEY, time.time(), None)
+    flushed = LOG.flush(_flush_entries)
+    return flushed[1] if flushed else 0
@@ -0,0 +1,118 @@
+"""
+A numbered log in the cache, for buffering writes that are applied in bulk.
+
+Writers take the next sequence number with an atomic incr and store their
+entry under it; flush() reads the entries after the last flushed number in
+batches, hands them to the caller's apply function and then moves the
+flushed mark, all under a cache lock so only one flush runs at a time.
+
+An entry can be missing because its writer has taken a number but not
+stored the entry yet, or because the cache evicted it. A flush stops at the
+first gap and only skips it once a previous flush stopped there too; the
+skipped numbers are passed to the caller's late() hook after the mark has
+moved, so an entry written late can still be picked up (see
+resources/votes.py). Writers can check written_late() to find out a flush
+already gave up on their number.
+
+Every process must share one cache (Redis, memcached) for a flush in one
+process to see the entries of another.
+"""
+from django.core.cache import cache
+
+
+# Buffered entries outlive several missed flushes before the cache drops them
+ENTRY_TIMEOUT = 60 * 60 * 24
+LOCK_TIMEOUT = 60 * 5
+FLUSH_BATCH = 1000
+
+
+class WriteBehindLog:
+    """The log stored under cache keys starting with `prefix`"""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.sequence_key = f'{prefix}:sequence'
+        self.flushed_key = f'{prefix}:flushed'
+        self.lock_key = f'{prefix}:flush-lock'
+        self.gap_key = f'{prefix}:gap'
+
+    def entry_key(self, sequence):
+        return f'{self.prefix}:entry:{sequence}'
+
+    def flushed(self):
+        """The last sequence number a flush has moved past"""
+        return cache.get(self.flushed_key, 0)
+
+    def pending(self):
+        """Number of sequence numbers taken but not yet flushed"""
+        return max(cache.get(self.sequence_key, 0) - self.flushed(), 0)
+
+    def next_sequence(self):
+        try:
+            return cache.incr(self.sequence_key)
+        except ValueError:
+            # First entry since the cache was emptied: start after anything flushed
+            cache.add(self.sequence_key, self.flushed(), None)
+            return cache.incr(self.sequence_key)
+
+    def write(self, sequence, entry):
+        cache.set(self.entry_key(sequence), entry, ENTRY_TIMEOUT)
+
+    def append(self, entry):
+        sequence = self.next_sequence()
+        self.write(sequence, entry)
+        return sequence
+
+    def written_late(self, sequence):
+        """Whether a flush has already moved past (and skipped) this number"""
+        return sequence <= self.flushed()
+
+    def get_many(self, numbers):
+        """{sequence: entry} for the given numbers still in the cache"""
+        keys = {self.entry_key(n): n for n in numbers}
+        return {keys[key]: entry for key, entry in cache.get_many(list(keys)).items()}
+
+    def _read(self, flushed, sequence):
+        """([(sequence, entry)], last number read, skipped gaps)"""
+        skippable = cache.get(self.gap_key)
+        entries, skipped = [], []
+        for start in range(flushed + 1, sequence + 1, FLUSH_BATCH):
+            numbers = range(start, min(start + FLUSH_BATCH, sequence + 1))
+            found = self.get_many(numbers)
+            for n in numbers:
+                if n not in found:
+                    if n == skippable:
+                        skipped.append(n)
+                        continue
+                    cache.set(self.gap_key, n, None)
+                    return entries, n - 1, skipped
+                entries.append((n, found[n]))
+        return entries, sequence, skipped
+
+    def flush(self, apply, late=None):
+        """
+        Pass every readable entry, as a list of (sequence, entry), to apply()
+        and move the flushed mark past them; late(skipped numbers) runs once
+        the mark has moved.
+
+        Returns (sequence numbers flushed, apply's result), or None if
+        another flush holds the lock or the log is empty.
+        """
+        if not cache.add(self.lock_key, 1, LOCK_TIMEOUT):
+            return None
+        try:
+            flushed = self.flushed()
+            sequence = cache.get(self.sequence_key, 0)
+            if sequence <= flushed:
+                return None
+
+            entries, end, skipped = self._read(flushed, sequence)
+            result = apply(entries)
+            for start in range(flushed + 1, end + 1, FLUSH_BATCH):
+                cache.delete_many([self.entry_key(n) for n in range(start, min(start + FLUSH_BATCH, end + 1))])
+            cache.set(self.flushed_key, end, None)
+            if late is not None and skipped:
+                late(skipped)
+            return end - flushed, result
+        finally:
+            cache.delete(self.lock_key)